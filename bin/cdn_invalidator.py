@@ -3,7 +3,15 @@
 
 import os
 import sys
-from maxcdn import MaxCDN
+import json
+import time
+import hashlib
+import argparse
+import urllib2
+import multiprocessing.pool
+
+BATCH_SIZE = 200
+
 
 def get_paths_list(path, prefix):
     result = []
@@ -17,14 +25,86 @@ def get_paths_list(path, prefix):
     return result
 
 
+def get_file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), ''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def get_hashes_manifest(path):
+    # relative file path -> content hash
+    result = {}
+
+    for dir_path, subdir_list, files_list in os.walk(path):
+        for file_name in files_list:
+            file_path = os.path.join(dir_path, file_name)
+            result[os.path.relpath(file_path, path).replace('\\', '/')] = get_file_hash(file_path)
+
+    return result
+
+
+def get_changed_paths(manifest, previous_manifest, prefix):
+    # added, changed and removed files, added ones may have been cached as missing
+    changed = [rel_path for (rel_path, file_hash) in manifest.iteritems()
+               if previous_manifest.get(rel_path) != file_hash]
+    removed = [rel_path for rel_path in previous_manifest if rel_path not in manifest]
+    return [os.path.join(prefix, rel_path) for rel_path in sorted(changed + removed)]
+
+
 def split(array, size):
     for i in range(0, len(array), size):
         yield array[i:i + size]
 
 
-if __name__ == '__main__':
-    dir_invalidate = sys.argv[1]
-    url_prefix = sys.argv[2]
+class MaxCDNPurger(object):
+    def __init__(self, alias, consumer_key, consumer_secret, zone_id):
+        from maxcdn import MaxCDN
+        self.api = MaxCDN(alias, consumer_key, consumer_secret)
+        self.zone_id = zone_id
+
+    def purge(self, paths):
+        self.api.purge(self.zone_id, paths)
+
+
+class HttpPurger(object):
+    # Sends {"files": [...]} to the endpoint, e.g. a local stub of the purge API
+    def __init__(self, endpoint, timeout=30):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def purge(self, paths):
+        request = urllib2.Request(self.endpoint, json.dumps({'files': paths}), {'Content-Type': 'application/json'})
+        urllib2.urlopen(request, timeout=self.timeout).read()
+
+
+def purge_batch(purger, paths, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            purger.purge(paths)
+            return None
+        except Exception as e:
+            if attempt == retries:
+                return '%s: %s' % (type(e).__name__, e)
+            time.sleep(backoff * (2 ** attempt))
+
+
+def purge(purger, paths, jobs, retries, backoff):
+    # returns list of (batch, error) for failed batches
+    batches = list(split(paths, BATCH_SIZE))
+    if not batches:
+        return []
+    pool = multiprocessing.pool.ThreadPool(min(jobs, len(batches)))
+    try:
+        errors = pool.map(lambda batch: purge_batch(purger, batch, retries, backoff), batches)
+    finally:
+        pool.close()
+        pool.join()
+    return [(batch, error) for (batch, error) in zip(batches, errors) if error is not None]
+
+
+def get_max_cdn_purger():
     cdn_alias = os.environ.get('CDN_ALIAS')
     cdn_consumer_key = os.environ.get('CDN_CONSUMER_KEY')
     cdn_consumer_secret = os.environ.get('CDN_CONSUMER_SECRET')
@@ -43,12 +123,58 @@ if __name__ == '__main__':
         print("Environment variable was not found: CDN_ZONE_ID\n export CDN_ZONE_ID='blabla'")
         sys.exit(1)
 
-    paths = get_paths_list(dir_invalidate, url_prefix)
+    return MaxCDNPurger(cdn_alias, cdn_consumer_key, cdn_consumer_secret, cdn_zone_id)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Purge CDN cache for the files of the directory')
+    parser.add_argument('dir_invalidate',
+                        help='directory with the released files')
+    parser.add_argument('url_prefix',
+                        help='path prefix of the directory files on the CDN')
+    parser.add_argument('-m', '--manifest',
+                        action='store',
+                        help='content hashes manifest of the previous release, only files added, changed or removed '
+                             'since it are purged')
+    parser.add_argument('-w', '--write_manifest',
+                        action='store',
+                        help='write content hashes manifest of the directory to this path')
+    parser.add_argument('-e', '--endpoint',
+                        action='store',
+                        help='send purge requests to this HTTP endpoint instead of MaxCDN API, e.g. a local stub')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=4,
+                        help='number of purge requests sent simultaneously. Defaults to 4')
+    parser.add_argument('-r', '--retries',
+                        type=int,
+                        default=3,
+                        help='number of retries of a failed purge request. Defaults to 3')
+    parser.add_argument('-b', '--backoff',
+                        type=float,
+                        default=1,
+                        help='delay before the first retry in seconds, doubled for each next retry. Defaults to 1')
+    args = parser.parse_args()
+
+    purger = HttpPurger(args.endpoint) if args.endpoint else get_max_cdn_purger()
+
+    if args.manifest or args.write_manifest:
+        manifest = get_hashes_manifest(args.dir_invalidate)
+        if args.write_manifest:
+            with open(args.write_manifest, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+
+    if args.manifest:
+        with open(args.manifest, 'r') as f:
+            paths = get_changed_paths(manifest, json.load(f), args.url_prefix)
+    else:
+        paths = get_paths_list(args.dir_invalidate, args.url_prefix)
 
     print "Invalidate following files:"
     print paths
 
-    pieces = list(split(paths, 200))
-    for piece in pieces:
-        api = MaxCDN(cdn_alias, cdn_consumer_key, cdn_consumer_secret)
-        api.purge(cdn_zone_id, piece)
+    failed = purge(purger, paths, args.jobs, args.retries, args.backoff)
+    for (batch, error) in failed:
+        print 'Failed to purge %s files (%s): %s' % (len(batch), error, batch)
+    if failed:
+        sys.exit(1)
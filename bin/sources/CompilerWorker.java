@@ -0,0 +1,89 @@
+import com.google.javascript.jscomp.CommandLineRunner;
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+
+
+/**
+ * Long-lived Closure Compiler process used by build.py compiler workers (see -cw option).
+ * Keeps the JVM warm and runs compile requests read from stdin one by one.
+ *
+ * Request: "<arguments count>\n" followed by "<byte length>\n<UTF-8 bytes>" for each argument.
+ * Response: "<exit code>\n<byte length>\n<UTF-8 bytes of the compiler output>".
+ * The worker writes "ready\n" when it is able to accept requests and exits when stdin is closed.
+ */
+public final class CompilerWorker {
+  private static final class Runner extends CommandLineRunner {
+    Runner(String[] args, PrintStream out, PrintStream err) {
+      super(args, out, err);
+    }
+
+    int execute() throws IOException {
+      return shouldRunCompiler() ? doRun() : -1;
+    }
+  }
+
+  private static String readLine(InputStream in) throws IOException {
+    StringBuilder sb = new StringBuilder();
+    int c;
+    while ((c = in.read()) != '\n') {
+      if (c == -1) {
+        return null;
+      }
+      sb.append((char) c);
+    }
+    return sb.toString().trim();
+  }
+
+  private static byte[] readBytes(InputStream in, int length) throws IOException {
+    byte[] res = new byte[length];
+    int offset = 0;
+    while (offset < length) {
+      int read = in.read(res, offset, length - offset);
+      if (read == -1) {
+        throw new IOException("Unexpected end of request");
+      }
+      offset += read;
+    }
+    return res;
+  }
+
+  public static void main(String[] argv) throws IOException {
+    InputStream in = new BufferedInputStream(System.in);
+    OutputStream protocol = new BufferedOutputStream(System.out);
+    // nothing but responses should get to the protocol stream
+    System.setOut(System.err);
+
+    protocol.write("ready\n".getBytes("UTF-8"));
+    protocol.flush();
+
+    String line;
+    while ((line = readLine(in)) != null) {
+      String[] args = new String[Integer.parseInt(line)];
+      for (int i = 0; i < args.length; i++) {
+        args[i] = new String(readBytes(in, Integer.parseInt(readLine(in))), "UTF-8");
+      }
+
+      ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+      PrintStream output = new PrintStream(buffer, true, "UTF-8");
+      int code;
+      try {
+        code = new Runner(args, output, output).execute();
+      } catch (Throwable e) {
+        e.printStackTrace(output);
+        code = 1;
+      }
+      output.flush();
+
+      byte[] bytes = buffer.toByteArray();
+      protocol.write((code + "\n" + bytes.length + "\n").getBytes("UTF-8"));
+      protocol.write(bytes);
+      protocol.flush();
+    }
+  }
+}
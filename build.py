@@ -6,10 +6,6 @@ import imp
 import os
 import sys
 import subprocess
-import platform
-import urllib
-import urllib2
-import zipfile
 import time
 import argparse
 import shlex
@@ -19,7 +15,16 @@ import traceback
 import collections
 import time
 import re
-import json
+import StringIO
+import threading
+import Queue
+import atexit
+import hashlib
+import shutil
+import marshal
+import cPickle
+import zlib
+import contextlib
 
 
 # region --- Project paths
@@ -38,6 +43,8 @@ MANIFEST_OUT_PATH = os.path.join(OUT_PATH, 'file.manifest.json')
 TRAVIS_COMMANDS_PATH = os.path.join(OUT_PATH, 'travis-copy-bundles')
 DIST_PATH = os.path.join(PROJECT_PATH, 'dist')
 THEMES_PATH = os.path.join(SRC_PATH, 'themes')
+CSS_SRC_PATH = os.path.join(PROJECT_PATH, 'css')
+SOURCES_PATH = os.path.join(PROJECT_PATH, 'bin', 'sources')
 
 # graphics
 GRAPHICS_PATH = os.path.join(LIBS_PATH, 'graphicsjs')
@@ -60,6 +67,13 @@ MODULES_CONFIG_PATH = os.path.join(PROJECT_PATH, 'bin', 'sources','modules.json'
 VERSION_INI_PATH = os.path.join(PROJECT_PATH, 'version.ini')
 ANYCHART_DEPS_PATH = os.path.join(SRC_PATH, 'deps.js')
 CLOSURE_DEPS_PATH = os.path.join(CLOSURE_SOURCE_PATH, 'deps.js')
+DEPS_CACHE_PATH = os.path.join(OUT_PATH, 'deps.cache.json')
+DEPS_INDEX_PATH = os.path.join(OUT_PATH, 'deps.index')
+COMPRESSION_CACHE_PATH = os.path.join(OUT_PATH, 'compression.cache.json')
+GZIP_SIZES_CACHE_PATH = os.path.join(OUT_PATH, 'gzip-sizes.cache.json')
+MEMOIZE_CACHE_PATH = os.path.join(OUT_PATH, 'cache', 'memoize.pickle')
+VERSION_CACHE_PATH = os.path.join(OUT_PATH, 'version.cache.json')
+GIT_HEAD_PATHS = [os.path.join(PROJECT_PATH, '.git', 'HEAD'), os.path.join(PROJECT_PATH, '.git', 'logs', 'HEAD')]
 
 CHECKS_FLAGS = os.path.join(PROJECT_PATH, 'bin', 'sources','checks.flags')
 COMMON_FLAGS = os.path.join(PROJECT_PATH, 'bin', 'sources','common.flags')
@@ -67,8 +81,17 @@ BINARIES_WRAPPER_START = os.path.join(PROJECT_PATH, 'bin', 'sources','binaries_w
 BINARIES_WRAPPER_END = os.path.join(PROJECT_PATH, 'bin', 'sources','binaries_wrapper_end.txt')
 AMD_WRAPPER_START = os.path.join(PROJECT_PATH, 'bin', 'sources','amd_wrapper_start.txt')
 AMD_WRAPPER_END = os.path.join(PROJECT_PATH, 'bin', 'sources','amd_wrapper_end.txt')
+COMPILER_WORKER_SOURCE_PATH = os.path.join(PROJECT_PATH, 'bin', 'sources', 'CompilerWorker.java')
+COMPILER_WORKER_CLASSES_PATH = os.path.join(OUT_PATH, 'compiler-worker')
+
+# compiled parts cache
+BUILD_CACHE_PATH = os.path.join(OUT_PATH, 'cache', 'parts')
+# cache size limit in Mb, least recently used entries are removed first
+BUILD_CACHE_SIZE_LIMIT = 256
 GIT_CONTRIBUTORS_URL = 'https://api.github.com/repos/anychart/anychart/contributors'
 GIT_COMPARE_URL_TEMPLATE = 'https://api.github.com/repos/AnyChart/AnyChart/compare/master...%s'
+# GitHub API requests timeout in seconds, local git is used if the API is not available
+GIT_API_TIMEOUT = 10
 
 
 # endregion
@@ -82,6 +105,9 @@ def __create_dir_if_not_exists(path):
 
 
 def __download_and_unzip_from_http(from_url, path, dir_name):
+    import urllib
+    import zipfile
+
     z_obj_path = os.path.join(path, dir_name + '.zip')
 
     # download zip archive from url
@@ -119,7 +145,13 @@ def __ensure_installed(module_name, version=None):
         return True
 
 
-def sync_libs(needs_lesscpy=False, needs_jsb=False):
+# requirements already checked by the process, (needs_lesscpy, needs_jsb)
+__synced_libs = set()
+
+
+def sync_libs(needs_lesscpy=False, needs_jsb=False, needs_compiler=True):
+    if (needs_lesscpy, needs_jsb, needs_compiler) in __synced_libs:
+        return
     __create_dir_if_not_exists(LIBS_PATH)
     flag = False
     if not os.path.exists(CLOSURE_LIBRARY_PATH) or \
@@ -130,7 +162,7 @@ def sync_libs(needs_lesscpy=False, needs_jsb=False):
         subprocess.call(['rm', '-f', '.git/hooks/post-checkout'])
         subprocess.call(['ln', '-s', '../../update-submodules', '.git/hooks/post-checkout'])
         print 'Done'
-    if not os.path.exists(COMPILER_PATH):
+    if needs_compiler and not os.path.exists(COMPILER_PATH):
         flag = True
         print 'Downloading closure compiler'
         __download_and_unzip_from_http(
@@ -145,26 +177,170 @@ def sync_libs(needs_lesscpy=False, needs_jsb=False):
         flag = __ensure_installed('jsbeautifier', '1.6.2') or flag
     if flag:
         print 'All libraries installed'
+    __synced_libs.add((needs_lesscpy, needs_jsb, needs_compiler))
+
+
+def __get_file_hash(path, algorithm='sha1'):
+    h = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), ''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def __get_gzip_size(path):
+    # Byte exact size of the file gzipped with the max level. File is compressed in memory by chunks,
+    # results are cached by content hash in GZIP_SIZES_CACHE_PATH, so any command can reuse them.
+    file_hash = __get_file_hash(path)
+    entries = __get_gzip_sizes_cache()
+    if file_hash not in entries:
+        with __trace_span('gzip', file=os.path.basename(path)):
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            size = 0
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), ''):
+                    size += len(compressor.compress(chunk))
+            entries[file_hash] = [size + len(compressor.flush()), path]
+    # identical files share the entry, it keeps the last used path
+    entry = [entries[file_hash][0], path]
+    entries[file_hash] = entry
+    __gzip_sizes_cache['used'].pop(file_hash, None)
+    __gzip_sizes_cache['used'][file_hash] = entry
+    return entry[0]
+
+
+# content hash -> [gzipped size, path], entries used by this process are written on exit
+__gzip_sizes_cache = {'entries': None, 'used': collections.OrderedDict()}
+
+
+def __get_gzip_sizes_cache():
+    if __gzip_sizes_cache['entries'] is None:
+        __gzip_sizes_cache['entries'] = {}
+        try:
+            with open(GZIP_SIZES_CACHE_PATH, 'r') as f:
+                __gzip_sizes_cache['entries'].update(
+                    (file_hash, entry) for (file_hash, entry) in json.load(f).iteritems() if isinstance(entry, list))
+        except (IOError, ValueError):
+            pass
+    return __gzip_sizes_cache['entries']
+
+
+def __pop_gzip_sizes():
+    used = collections.OrderedDict(__gzip_sizes_cache['used'])
+    __gzip_sizes_cache['used'].clear()
+    return used
+
+
+def __merge_gzip_sizes(used):
+    __get_gzip_sizes_cache().update(used)
+    for (file_hash, entry) in used.iteritems():
+        __gzip_sizes_cache['used'].pop(file_hash, None)
+        __gzip_sizes_cache['used'][file_hash] = entry
+
+
+def __write_gzip_sizes_cache():
+    # Entries of removed files are dropped. Path gets a new entry each time its content changes,
+    # so only the last used entry of each path used by this run is kept.
+    if not __gzip_sizes_cache['used']:
+        return
+    last_used = dict((path, file_hash) for (file_hash, (size, path)) in __gzip_sizes_cache['used'].iteritems())
+    entries = dict((file_hash, entry) for (file_hash, entry) in __get_gzip_sizes_cache().iteritems()
+                   if last_used.get(entry[1], file_hash) == file_hash and os.path.exists(entry[1]))
+    __create_dir_if_not_exists(OUT_PATH)
+    tmp_path = '%s.%s.tmp' % (GZIP_SIZES_CACHE_PATH, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(entries, f)
+    os.rename(tmp_path, GZIP_SIZES_CACHE_PATH)
+    __gzip_sizes_cache['entries'] = entries
+    __gzip_sizes_cache['used'].clear()
 
 
-def __gzip_file(f):
-    with open(f, 'rb') as f_in, gzip.open(f + '.gz', 'wb') as f_out:
-        f_out.writelines(f_in)
+def __get_gzip_file_size(f):
+    # gzipped size in Kb, as it is written to modules.json
+    return int(round(__get_gzip_size(f) / 1000))
+
+
+def __call_captured(func_name, args, kwargs):
+    # calls module level function by name, stdout of the call is collected to its own buffer
+    # returns (exit_code, result, output) tuple
+    output = StringIO.StringIO()
+    stdout = sys.stdout
+    sys.stdout = output
+    code = 0
+    res = None
+    try:
+        res = globals()[func_name](*args, **kwargs)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except (StandardError, KeyboardInterrupt):
+        print traceback.format_exc()
+        code = 1
+    finally:
+        sys.stdout = stdout
+    return code, res, output.getvalue()
 
 
-def __get_gzip_file_size(f):
-    gzip_path = f + '.gz'
-    rm_after = False
+def __pool_worker(task):
+    # process level state (like compiler workers stats) is passed back to the parent process with the result
+    return __call_captured(*task) + (__pop_process_state(),)
+
 
-    if not os.path.exists(gzip_path):
-        __gzip_file(f)
-        rm_after = True
-    size = os.path.getsize(gzip_path)
+def __init_pool_process():
+    # forked process must not share compiler workers, stats, trace events, diagnostics and gzip sizes with the parent
+    __reset_compiler_workers()
+    del __trace['events'][:]
+    del __diagnostics['records'][:]
+    __gzip_sizes_cache['used'].clear()
 
-    if rm_after:
-        os.remove(gzip_path)
 
-    return int(round(size / 1000))
+def __pop_process_state():
+    return {'compiler_workers': __pop_compiler_workers_stats(), 'trace': __pop_trace_events(),
+            'diagnostics': __pop_diagnostics(), 'gzip_sizes': __pop_gzip_sizes()}
+
+
+def __merge_process_state(state):
+    __merge_compiler_workers_stats(state['compiler_workers'])
+    __trace['events'].extend(state['trace'])
+    __diagnostics['records'].extend(state['diagnostics'])
+    __merge_gzip_sizes(state['gzip_sizes'])
+
+
+def __run_in_pool(tasks, jobs, fail_fast=False):
+    # tasks is a list of (func_name, args, kwargs) tuples
+    # returns list of (exit_code, result, output) tuples in tasks order
+    # with fail_fast the pool is terminated on the first failed task, unfinished tasks get (None, None, '')
+    import multiprocessing
+
+    failed = threading.Event()
+
+    def on_result(result):
+        if result[0]:
+            failed.set()
+
+    pool = multiprocessing.Pool(min(jobs, len(tasks)), initializer=__init_pool_process)
+    try:
+        results = [pool.apply_async(__pool_worker, (task,), callback=on_result) for task in tasks]
+        pool.close()
+        if fail_fast:
+            while not failed.is_set() and not all(result.ready() for result in results):
+                failed.wait(0.1)
+            if failed.is_set():
+                pool.terminate()
+        res = []
+        for result in results:
+            if not result.ready() and failed.is_set() and fail_fast:
+                res.append((None, None, ''))
+                continue
+            # get with timeout keeps KeyboardInterrupt working
+            (code, value, output, state) = result.get(0xFFFF)
+            __merge_process_state(state)
+            res.append((code, value, output))
+        return res
+    except KeyboardInterrupt:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
 
 
 # endregion
@@ -172,15 +348,79 @@ def __get_gzip_file_size(f):
 # ======================================================================================================================
 # Decorators
 # ======================================================================================================================
-def memoize(func):
-    def wrapper(*args, **kwargs):
-        if not hasattr(func, 'cache'):
-            func.cache = func(*args, **kwargs)
-        return func.cache
+def memoize(func=None, files=None, store=False):
+    # Caches results by call arguments. If files callable is passed, cached result is dropped as soon as
+    # mtime or size of any of returned paths changes. Stored results are also kept in MEMOIZE_CACHE_PATH
+    # to be reused by next runs, so they should be picklable.
+    if func is None:
+        return lambda f: memoize(f, files, store)
+
+    cache = {}
+    name = func.__name__
 
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        stamp = __get_files_stamp(files()) if files else None
+        if key in cache and cache[key][0] == stamp:
+            return cache[key][1]
+        store_key = (name, repr(key))
+        stored = __get_memoize_store().get(store_key) if store else None
+        if stored is not None and stored[0] == stamp:
+            value = stored[1]
+        else:
+            value = func(*args, **kwargs)
+            if store:
+                __put_memoize_store(store_key, (stamp, value))
+        cache[key] = (stamp, value)
+        return value
+
+    wrapper.reset = cache.clear
+    wrapper.__name__ = name
+    memoize.wrappers.append(wrapper)
     return wrapper
 
 
+memoize.wrappers = []
+__memoize_store = {}
+
+
+def __get_files_stamp(paths):
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamp.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            stamp.append((path, None, None))
+    return tuple(stamp)
+
+
+def __get_memoize_store():
+    if 'values' not in __memoize_store:
+        __memoize_store['values'] = {}
+        if os.path.exists(MEMOIZE_CACHE_PATH):
+            try:
+                with open(MEMOIZE_CACHE_PATH, 'rb') as f:
+                    __memoize_store['values'] = cPickle.load(f)
+            except Exception:
+                # broken or written by incompatible version, it is rebuilt
+                pass
+    return __memoize_store['values']
+
+
+def __put_memoize_store(key, value):
+    values = __get_memoize_store()
+    values[key] = value
+    try:
+        __create_dir_if_not_exists(os.path.dirname(MEMOIZE_CACHE_PATH))
+        tmp_path = '%s.%s.tmp' % (MEMOIZE_CACHE_PATH, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            cPickle.dump(values, f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_path, MEMOIZE_CACHE_PATH)
+    except (IOError, OSError):
+        pass
+
+
 def stopwatch(prefix=''):
     def decorator(func):
         def wrapper(*args, **kwargs):
@@ -194,11 +434,11 @@ def stopwatch(prefix=''):
     return decorator
 
 
-def sync_required(needs_lesscpy=False, needs_jsb=False):
+def sync_required(needs_lesscpy=False, needs_jsb=False, needs_compiler=True):
     def sync_decorator(func):
         def wrapper(*args, **kwargs):
-            sync_libs(needs_lesscpy, needs_jsb)
-            func(*args, **kwargs)
+            sync_libs(needs_lesscpy, needs_jsb, needs_compiler)
+            return func(*args, **kwargs)
 
         return wrapper
 
@@ -213,19 +453,93 @@ def needs_out_dir(func):
     return wrapper
 
 
+def traced(name, *arg_names):
+    # Records calls as trace spans, arg_names are the function arguments to add to the span.
+    # Must be applied directly to the function, so its argument names are available.
+    def decorator(func):
+        var_names = func.func_code.co_varnames[:func.func_code.co_argcount]
+
+        def wrapper(*args, **kwargs):
+            if __trace['path'] is None:
+                return func(*args, **kwargs)
+            values = dict(zip(var_names, args))
+            values.update(kwargs)
+            with __trace_span(name, **{arg_name: values.get(arg_name) for arg_name in arg_names}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# endregion
+# region --- Tracing
+# ======================================================================================================================
+# Tracing
+# ======================================================================================================================
+# Spans in Chrome trace event format, recorded when --trace is passed
+__trace = {'path': None, 'events': []}
+
+
+@contextlib.contextmanager
+def __trace_span(name, **args):
+    # args dict is yielded, so the body can add values known after the work is done
+    if __trace['path'] is None:
+        yield args
+        return
+    t = time.time()
+    try:
+        yield args
+    finally:
+        __trace['events'].append({
+            'name': name,
+            'cat': 'build',
+            'ph': 'X',
+            'ts': int(t * 1e6),
+            'dur': int((time.time() - t) * 1e6),
+            'pid': os.getpid(),
+            'tid': threading.current_thread().ident,
+            'args': args
+        })
+
+
+def __init_trace(path):
+    __trace['path'] = path
+    del __trace['events'][:]
+
+
+def __pop_trace_events():
+    events = list(__trace['events'])
+    del __trace['events'][:]
+    return events
+
+
+def __write_trace():
+    if __trace['path'] is None:
+        return
+    path = os.path.join(PROJECT_PATH, __trace['path'])
+    __create_dir_if_not_exists(os.path.dirname(path))
+    pids = sorted(set(event['pid'] for event in __trace['events']))
+    meta = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+             'args': {'name': 'build.py' if pid == os.getpid() else 'build.py worker %s' % pid}} for pid in pids]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': meta + __trace['events'], 'displayTimeUnit': 'ms'}, f)
+    print 'Trace written to %s (%s spans)' % (path, len(__trace['events']))
+
+
 # endregion
 # region --- Project file parsers
 # ======================================================================================================================
 #                            Project file parsers
 # ======================================================================================================================
-@memoize
+@memoize(files=lambda: [MODULES_CONFIG_PATH], store=True)
 def __get_modules_config():
     with open(MODULES_CONFIG_PATH, 'r') as f:
         res = json.load(f)
     return res
 
 
-@memoize
+@memoize(files=lambda: [THEMES_PATH], store=True)
 def __get_themes_list():
     themes_list = []
     restricted = ['merging.js', 'defaultTheme.js']
@@ -247,6 +561,7 @@ def __get_version():
 
     return '%s.%s.%s' % (major, minor, patch)
 
+@memoize(files=lambda: GIT_HEAD_PATHS)
 def __get_current_branch_name():
     (name_output, name_err) = subprocess.Popen(
         ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
@@ -256,39 +571,144 @@ def __get_current_branch_name():
     return name_output.strip()
 
 
-@memoize
+# Commits count part of the build version. On CI it is taken from GitHub API, otherwise from local git, both
+# can be switched off by --offline. Local counts are cached by HEAD SHA in VERSION_CACHE_PATH and computed
+# incrementally from the last cached commit.
+__version_resolver = {'offline': False}
+
+
+def __init_version_resolver(offline):
+    __version_resolver['offline'] = offline
+
+
+def __git(*args):
+    # returns stripped output or None if git is not available or fails
+    try:
+        process = subprocess.Popen(['git'] + list(args),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   cwd=PROJECT_PATH)
+    except OSError:
+        return None
+    (output, err) = process.communicate()
+    return output.strip() if process.returncode == 0 else None
+
+
+def __http_get_json(url, token=None):
+    import urllib2
+    # see https://anychart.atlassian.net/browse/DVF-3193
+    request = urllib2.Request(url, None, {'Authorization': 'token %s' % token if token else ''})
+    return json.loads(urllib2.urlopen(request, timeout=GIT_API_TIMEOUT).read())
+
+
+def __get_github_commits_count(branch, token):
+    contributors_data = __http_get_json(GIT_CONTRIBUTORS_URL, token)
+    contributions = 0
+    for contributor in contributors_data:
+        contributions += contributor['contributions']
+
+    compare_data = __http_get_json(GIT_COMPARE_URL_TEMPLATE % branch, token)
+    behind_by = compare_data.get('behind_by', 0)
+    ahead_by = compare_data.get('ahead_by', 0)
+    return contributions - behind_by + ahead_by
+
+
+def __load_version_cache():
+    if os.path.exists(VERSION_CACHE_PATH):
+        try:
+            with open(VERSION_CACHE_PATH, 'r') as f:
+                return json.load(f)
+        except ValueError:
+            pass
+    return {'last': None, 'commits': {}}
+
+
+def __save_version_cache(cache):
+    try:
+        __create_dir_if_not_exists(OUT_PATH)
+        tmp_path = '%s.%s.tmp' % (VERSION_CACHE_PATH, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.rename(tmp_path, VERSION_CACHE_PATH)
+    except (IOError, OSError):
+        pass
+
+
+def __get_local_commits_count():
+    # returns None if there is no git or the clone is too shallow to count
+    head = __git('rev-parse', 'HEAD')
+    if head is None:
+        return None
+    cache = __load_version_cache()
+    if head in cache['commits']:
+        return cache['commits'][head]
+
+    count = None
+    last = cache['last']
+    if last in cache['commits'] and __git('merge-base', '--is-ancestor', last, 'HEAD') is not None:
+        # commits reachable from HEAD are the ones reachable from its ancestor plus the new ones
+        new_count = __git('rev-list', '--count', '%s..HEAD' % last)
+        if new_count is not None:
+            count = cache['commits'][last] + int(new_count)
+    if count is None:
+        if __is_shallow_repository():
+            print 'Warning: commits count can not be computed in a shallow clone, %s is not cached in %s' % (
+                head, VERSION_CACHE_PATH)
+            return None
+        full_count = __git('rev-list', '--count', 'HEAD')
+        if full_count is None:
+            return None
+        count = int(full_count)
+
+    cache['commits'][head] = count
+    cache['last'] = head
+    __save_version_cache(cache)
+    return count
+
+
+def __is_shallow_repository():
+    shallow = __git('rev-parse', '--is-shallow-repository')
+    if shallow in ('true', 'false'):
+        return shallow == 'true'
+    # git before 2.15 prints the option itself
+    return os.path.exists(os.path.join(PROJECT_PATH, '.git', 'shallow'))
+
+
+def __get_offline_commits_count():
+    # last known count, no git or network involved
+    cache = __load_version_cache()
+    if cache['last'] not in cache['commits']:
+        raise Exception('Build version can not be resolved: no commits count cached in %s yet. Run it with git '
+                        'available and the full history, use "git fetch --unshallow" for a shallow clone' %
+                        VERSION_CACHE_PATH)
+    return cache['commits'][cache['last']]
+
+
+@memoize(files=lambda: GIT_HEAD_PATHS + [VERSION_INI_PATH])
 def __get_build_version(is_release=False):
-    branch_name = __get_current_branch_name()
+    offline = __version_resolver['offline']
+    branch_name = __get_current_branch_name() if not offline else None
 
     travis_branch = os.environ.get('TRAVIS_BRANCH') if branch_name == 'HEAD' else None
     github_token = os.environ.get('GITHUB_TOKEN') if 'GITHUB_TOKEN' in os.environ else None
 
+    commits_count = None
     if travis_branch is not None:
-        # see https://anychart.atlassian.net/browse/DVF-3193
-        get_request = lambda url: urllib2.Request(url, None, {'Authorization' : 'token %s' % github_token if github_token else ''})
-
-        contributors_response = urllib2.urlopen(get_request(GIT_CONTRIBUTORS_URL))
-        contributors_data = json.loads(contributors_response.read())
-        contributions = 0
-        for contributor in contributors_data:
-            contributions += contributor['contributions']
-
-        compare_response = urllib2.urlopen(get_request(GIT_COMPARE_URL_TEMPLATE % travis_branch))
-        compare_data = json.loads(compare_response.read())
-
-        behind_by = compare_data.get('behind_by', 0)
-        ahead_by = compare_data.get('ahead_by', 0)
-        commits_count = contributions - behind_by + ahead_by
-    else:
-        (count_output, name_err) = subprocess.Popen(
-            ['git', 'rev-list', 'HEAD', '--count'],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            cwd=PROJECT_PATH
-        ).communicate()
-        commits_count = count_output.strip()
+        try:
+            commits_count = __get_github_commits_count(travis_branch, github_token)
+        except Exception as e:
+            # timeouts, rate limits and broken responses fall back to local git, then to the last cached count
+            print 'Warning: failed to get commits count from GitHub (%s: %s), local git is used' % (
+                type(e).__name__, e)
+
+    if commits_count is None:
+        commits_count = __get_local_commits_count() if not offline else None
+        if commits_count is None:
+            commits_count = __get_offline_commits_count()
+            if not offline:
+                print 'Warning: commits count can not be taken from git, last known one is used: %s' % commits_count
         if (is_release):
-            commits_count = int(commits_count) + 1
+            commits_count += 1
 
     return '%s.%s' % (__get_version(), commits_count)
 
@@ -431,7 +851,7 @@ def __print_version(*args, **kwargs):
         print __get_version()
 
 
-@memoize
+@memoize(files=lambda: [MODULES_CONFIG_PATH], store=True)
 def __get_builds():
     obj = __get_modules_config()
     modules = obj['parts']
@@ -459,8 +879,19 @@ def __get_builds():
     return {key: value[0] for (key, value) in builds.iteritems()}
 
 
-@memoize
+@memoize(files=lambda: [CLOSURE_DEPS_PATH, ANYCHART_DEPS_PATH])
+@traced('parse_deps')
 def __parse_deps():
+    key = __get_deps_index_key()
+    result = __load_deps_index(key)
+    if result is None:
+        result = __parse_deps_files()
+        __save_deps_index(key, result)
+    return result
+
+
+@traced('parse_deps_files')
+def __parse_deps_files():
     def __parse_file(deps_file_path):
         in_dep = False
         dep = ''
@@ -496,23 +927,335 @@ def __parse_deps():
     return result
 
 
+# Ordered files lists of namespaces closures, shared by all parts built with the same parsed deps
+__ns_files = {'deps': None, 'closures': {}}
+
+
+def __resolve_ns_files(entry_point):
+    # Returns files required for the namespace in dependencies first order (as depth first walk places them).
+    # Each namespace closure is computed once and reused for all entry points.
+    deps = __parse_deps()
+    if __ns_files['deps'] is not deps:
+        __ns_files['deps'] = deps
+        __ns_files['closures'] = {}
+    closures = __ns_files['closures']
+
+    def get_dep(name):
+        dep = deps.get(name)
+        if dep is None:
+            raise Exception('Unknown namespace %s requested for %s entry point' % (name, entry_point))
+        return dep
+
+    # stack items are (namespace, next requirement index), stack_files are files being resolved
+    stack = [(entry_point, 0)]
+    stack_files = [get_dep(entry_point)[0]]
+    while stack and entry_point not in closures:
+        (name, i) = stack[-1]
+        (file_name, provides, requires) = get_dep(name)
+        if i < len(requires):
+            stack[-1] = (name, i + 1)
+            requirement = requires[i]
+            required_file = get_dep(requirement)[0]
+            # namespaces provided by the same file are already placed
+            if requirement in closures or required_file == file_name:
+                continue
+            if required_file in stack_files:
+                cycle = stack_files[stack_files.index(required_file):] + [required_file]
+                raise Exception('Circular dependency found for %s entry point: %s' %
+                                (entry_point, ' -> '.join(cycle)))
+            stack.append((requirement, 0))
+            stack_files.append(required_file)
+        else:
+            stack.pop()
+            stack_files.pop()
+            result = []
+            placed = set()
+            for requirement in requires:
+                for f in closures.get(requirement, ()):
+                    if f not in placed:
+                        placed.add(f)
+                        result.append(f)
+            if file_name not in placed:
+                result.append(file_name)
+            result = tuple(result)
+            for provide in provides:
+                closures[provide] = result
+
+    return closures[entry_point]
+
+
+def __get_deps_index_key():
+    return '%s:%s' % (__get_file_hash(CLOSURE_DEPS_PATH), __get_file_hash(ANYCHART_DEPS_PATH))
+
+
+@traced('deps_index.save')
+def __save_deps_index(key, deps):
+    # Index stores every file and namespace once, entries refer to them by position:
+    # (file index, provides indexes, requires indexes) for each file from deps files
+    files = {}
+    namespaces = {}
+    entries = {}
+    get_index = lambda items, value: items.setdefault(value, len(items))
+    for (file_name, provides, requires) in deps.itervalues():
+        if file_name not in entries:
+            entries[file_name] = (get_index(files, file_name),
+                                  tuple(get_index(namespaces, ns) for ns in provides),
+                                  tuple(get_index(namespaces, ns) for ns in requires))
+    index = {
+        'key': key,
+        'files': [value for (value, i) in sorted(files.iteritems(), key=lambda item: item[1])],
+        'namespaces': [value for (value, i) in sorted(namespaces.iteritems(), key=lambda item: item[1])],
+        'entries': entries.values()
+    }
+    __create_dir_if_not_exists(OUT_PATH)
+    with open(DEPS_INDEX_PATH, 'wb') as f:
+        marshal.dump(index, f)
+
+
+@traced('deps_index.load')
+def __load_deps_index(key):
+    # returns None if there is no index for the current deps files
+    try:
+        with open(DEPS_INDEX_PATH, 'rb') as f:
+            index = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(index, dict) or index.get('key') != key:
+        return None
+
+    files = map(intern, index['files'])
+    namespaces = map(intern, index['namespaces'])
+    result = dict()
+    for (file_index, provides, requires) in index['entries']:
+        provides = [namespaces[i] for i in provides]
+        dep = (files[file_index], provides, [namespaces[i] for i in requires])
+        for ns in provides:
+            result[ns] = dep
+    return result
+
+
+# endregion
+# region --- Deps file writing
+# ======================================================================================================================
+# Deps file writing
+# ======================================================================================================================
+# Same rules as closure-library depswriter.py uses, so the output is identical to the depswriter one
+__GOOG_PROVIDE_REGEX = re.compile(r'''^\s*goog\.provide\(\s*['"](.+)['"]\s*\)''')
+__GOOG_MODULE_REGEX = re.compile(r'''^\s*goog\.module\(\s*['"](.+)['"]\s*\)''')
+__GOOG_REQUIRE_REGEX = re.compile(r'''^\s*(?:(?:var|let|const)\s+[a-zA-Z0-9$_,:{}\s]*\s*=\s*)?'''
+                                  r'''goog\.require\(\s*['"](.+)['"]\s*\)''')
+
+
+def __parse_js_source(text):
+    provides = set()
+    requires = set()
+    is_module = False
+    for line in text.splitlines():
+        match = __GOOG_PROVIDE_REGEX.match(line)
+        if match:
+            provides.add(match.group(1))
+        match = __GOOG_MODULE_REGEX.match(line)
+        if match:
+            provides.add(match.group(1))
+            is_module = True
+        match = __GOOG_REQUIRE_REGEX.match(line)
+        if match:
+            requires.add(match.group(1))
+    return sorted(provides), sorted(requires), is_module
+
+
+def __scan_js_files(root):
+    for (path, dirs, files) in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for file_name in files:
+            if file_name.endswith('.js') and not file_name.startswith('.'):
+                yield os.path.join(path, file_name)
+
+
+def __make_deps_file(roots):
+    # Parsing results are cached by file mtime and content hash, only changed files are parsed again.
+    # Returns deps file text and parsed files count.
+    try:
+        with open(DEPS_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (IOError, ValueError):
+        cache = {}
+
+    new_cache = {}
+    deps = []
+    parsed_count = 0
+    for root in roots:
+        prefix = os.path.relpath(root, CLOSURE_SOURCE_PATH)
+        for path in __scan_js_files(root):
+            stat = os.stat(path)
+            cached = cache.get(path)
+            if cached is None or cached[0] != stat.st_mtime or cached[1] != stat.st_size:
+                with open(path, 'r') as f:
+                    text = f.read()
+                text_hash = hashlib.sha1(text).hexdigest()
+                if cached is None or cached[2] != text_hash:
+                    cached = [0, 0, text_hash] + list(__parse_js_source(text))
+                    parsed_count += 1
+                cached[0:2] = [stat.st_mtime, stat.st_size]
+            new_cache[path] = cached
+            # files without provides are not added to deps
+            if cached[3]:
+                deps.append((os.path.join(prefix, os.path.relpath(path, root)).replace('\\', '/'), cached))
+
+    __create_dir_if_not_exists(OUT_PATH)
+    with open(DEPS_CACHE_PATH, 'w') as f:
+        json.dump(new_cache, f)
+
+    to_js = lambda value: json.dumps(value).replace('"', '\'')
+    lines = ['// This file was autogenerated by depswriter.py.\n', '// Please do not edit.\n']
+    for (path, (mtime, size, text_hash, provides, requires, is_module)) in sorted(deps, key=lambda dep: dep[0]):
+        lines.append("goog.addDependency('%s', %s, %s, %s);\n" %
+                     (path, to_js(provides), to_js(requires), to_js({'module': 'goog'} if is_module else {})))
+    return ''.join(lines), parsed_count
+
+
+@traced('deps')
+def __update_deps_file():
+    # deps file is written only if its content is changed
+    # returns whether the file was written and parsed files count
+    (text, parsed_count) = __make_deps_file([SRC_PATH, GRAPHICS_SRC_PATH])
+    if os.path.exists(ANYCHART_DEPS_PATH):
+        with open(ANYCHART_DEPS_PATH, 'r') as f:
+            if f.read() == text:
+                return False, parsed_count
+    with open(ANYCHART_DEPS_PATH, 'w') as f:
+        f.write(text)
+    return True, parsed_count
+
+
 # endregion
 # region --- Compiler calling
 # =======================================================================================================================
 # Compiler calling
 # =======================================================================================================================
-def __call_console_commands(commands):
+def __split_console_commands(commands):
     commands = ' '.join(commands).replace('\\', '\\\\')
     # print ' '
     # print commands
     # print ' '
-    commands = shlex.split(commands)
+    return shlex.split(commands)
+
+
+def __call_console_commands(commands, on_line=None, usage=None):
+    # on_line is called for each output line as it arrives, the process is killed if it returns True.
+    # usage dict gets peak resident set size of the process in Kb as max_rss_kb, where the platform reports it.
+    commands = __split_console_commands(commands)
     p = subprocess.Popen(commands, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    (output, err) = p.communicate()
-    p.poll()
+    if on_line is None:
+        output = p.stdout.read()
+    else:
+        lines = []
+        for line in iter(p.stdout.readline, ''):
+            lines.append(line)
+            if on_line(line):
+                p.kill()
+                break
+        output = ''.join(lines)
+    p.stdout.close()
+    __wait_process(p, usage)
     return p.returncode, output
 
 
+def __wait_process(p, usage=None):
+    if usage is None or not hasattr(os, 'wait4'):
+        p.wait()
+        return
+    # resources of this very process, not the accumulated ones of all finished children
+    (pid, status, rusage) = os.wait4(p.pid, 0)
+    p.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    usage['max_rss_kb'] = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+
+
+# Closure Compiler diagnostics, like "path/to/file.js:12: ERROR - message" or "WARNING - message"
+COMPILER_DIAGNOSTIC = re.compile(r'^(?:(?P<file>.+?):(?P<line>\d+)(?::(?P<column>\d+))?: )?'
+                                 r'(?P<level>ERROR|WARNING) - (?P<message>.*?)(?: \[(?P<type>\w+)\])?\r?$')
+COMPILER_SUMMARY = re.compile(r'^\d+ error\(s\), \d+ warning\(s\)')
+
+# diagnostics of the compiler calls, see --diagnostics and --fail_fast
+__diagnostics = {'path': None, 'fail_fast': False, 'records': []}
+
+
+def __on_compiler_line(line):
+    # compiler output is shown as it arrives, returns True to stop the compiler in fail fast mode
+    sys.stdout.write(line)
+    sys.stdout.flush()
+    if __diagnostics['fail_fast']:
+        match = COMPILER_DIAGNOSTIC.match(line)
+        if match and match.group('level') == 'ERROR':
+            print 'Compilation stopped on the first error (fail fast)'
+            return True
+    return False
+
+
+def __parse_compiler_output(output):
+    # returns diagnostics records, lines following a diagnostic (source excerpt) are its context
+    records = []
+    record = None
+    for line in output.splitlines():
+        match = COMPILER_DIAGNOSTIC.match(line)
+        if match:
+            file_name = match.group('file')
+            if file_name and os.path.isabs(file_name) and file_name.startswith(PROJECT_PATH):
+                file_name = os.path.relpath(file_name, PROJECT_PATH).replace('\\', '/')
+            record = {
+                'level': match.group('level').lower(),
+                'file': file_name,
+                'line': int(match.group('line')) if match.group('line') else None,
+                'column': int(match.group('column')) if match.group('column') else None,
+                'message': match.group('message'),
+                'type': match.group('type'),
+                'context': []
+            }
+            records.append(record)
+        elif COMPILER_SUMMARY.match(line):
+            record = None
+        elif record is not None and line.strip():
+            record['context'].append(line)
+    return records
+
+
+def __collect_diagnostics(output, **fields):
+    records = __parse_compiler_output(output)
+    for record in records:
+        record.update(fields)
+    __diagnostics['records'].extend(records)
+    return records
+
+
+def __pop_diagnostics():
+    records = list(__diagnostics['records'])
+    del __diagnostics['records'][:]
+    return records
+
+
+def __init_diagnostics(path, fail_fast):
+    __diagnostics['path'] = path
+    __diagnostics['fail_fast'] = fail_fast
+
+
+def __print_diagnostics_summary():
+    records = __diagnostics['records']
+    errors = sum(1 for record in records if record['level'] == 'error')
+    print 'Compiler diagnostics: %s error(s), %s warning(s)' % (errors, len(records) - errors)
+
+
+def __write_diagnostics():
+    if __diagnostics['path'] is None:
+        return
+    path = os.path.join(PROJECT_PATH, __diagnostics['path'])
+    __create_dir_if_not_exists(os.path.dirname(path))
+    records = __diagnostics['records']
+    errors = sum(1 for record in records if record['level'] == 'error')
+    with open(path, 'w') as f:
+        json.dump({'errors': errors, 'warnings': len(records) - errors, 'records': records}, f, indent=2)
+    print 'Diagnostics written to %s' % path
+
+
 def __compile(entry_point=None, output=None, js_files=True, level="ADVANCED_OPTIMIZATIONS", theme=None,
               flag_file=COMMON_FLAGS, defines=None, version=False, dev_edition=None, perf_mon=None,
               additional_params=None, manifest=None, checks_only=False, debug_files=None, externs=None):
@@ -591,7 +1334,30 @@ def __compile(entry_point=None, output=None, js_files=True, level="ADVANCED_OPTI
     if additional_params is not None:
         commands.extend(additional_params)
 
-    return __call_console_commands(commands)
+    return __call_compiler(commands)
+
+
+def __call_compiler(commands):
+    usage = {}
+    with __trace_span('compiler', argc=len(commands), argv_bytes=len(' '.join(commands))) as span:
+        if __compiler_workers['max']:
+            res = __call_compiler_worker(commands)
+            if res is not None:
+                # the warm JVM outlives the call, so there is no memory usage of the call itself
+                span['worker'] = True
+                # worker replies with the whole output, so it can be shown only after the call
+                for line in res[1].splitlines(True):
+                    __on_compiler_line(line)
+                return res
+            t = time.time()
+            res = __call_console_commands(commands, __on_compiler_line, usage)
+            __compiler_workers_stats['fallbacks'] += 1
+            __compiler_workers_stats['fallback_time'] += time.time() - t
+        else:
+            res = __call_console_commands(commands, __on_compiler_line, usage)
+        if 'max_rss_kb' in usage:
+            span['max_rss_kb'] = usage['max_rss_kb']
+        return res
 
 
 def __get_theme_entry_point(theme_name):
@@ -609,11 +1375,178 @@ def __get_build_name(descriptor):
     return descriptor.get('build', 'bundle')
 
 
+# endregion
+# region --- Compiler workers
+# ======================================================================================================================
+# Compiler workers
+# ======================================================================================================================
+# Warm JVMs running bin/sources/CompilerWorker.java, each __compile call is sent to an idle worker instead of
+# starting a new java process. Workers are started lazily, up to __compiler_workers['max'] per build.py process.
+__compiler_workers = {
+    'max': 0,
+    'started': 0,
+    'idle': Queue.Queue(),
+    'all': [],
+    'lock': threading.Lock()
+}
+
+__compiler_workers_stats = collections.defaultdict(float)
+
+
+def __init_compiler_workers(count):
+    if count > 0 and __build_compiler_worker():
+        __compiler_workers['max'] = count
+        atexit.register(__stop_compiler_workers)
+    elif count > 0:
+        print 'Compiler workers are not available, falling back to a compiler process per call'
+
+
+def __reset_compiler_workers():
+    __compiler_workers['started'] = 0
+    __compiler_workers['idle'] = Queue.Queue()
+    __compiler_workers['all'] = []
+    __compiler_workers['lock'] = threading.Lock()
+    __compiler_workers_stats.clear()
+
+
+def __build_compiler_worker():
+    class_file = os.path.join(COMPILER_WORKER_CLASSES_PATH, 'CompilerWorker.class')
+    if not os.path.exists(COMPILER_PATH):
+        return False
+    if os.path.exists(class_file) and os.path.getmtime(class_file) >= max(
+            os.path.getmtime(COMPILER_WORKER_SOURCE_PATH), os.path.getmtime(COMPILER_PATH)):
+        return True
+    __create_dir_if_not_exists(OUT_PATH)
+    __create_dir_if_not_exists(COMPILER_WORKER_CLASSES_PATH)
+    try:
+        return subprocess.call(['javac', '-nowarn', '-cp', COMPILER_PATH, '-d', COMPILER_WORKER_CLASSES_PATH,
+                                COMPILER_WORKER_SOURCE_PATH]) == 0
+    except OSError:
+        return False
+
+
+def __start_compiler_worker():
+    t = time.time()
+    try:
+        with open(os.devnull, 'w') as devnull:
+            p = subprocess.Popen(['java', '-Xmx%sM' % JAVA_HEAP_SIZE,
+                                  '-cp', os.pathsep.join([COMPILER_WORKER_CLASSES_PATH, COMPILER_PATH]),
+                                  'CompilerWorker'],
+                                 stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull)
+    except OSError:
+        return None
+    if p.stdout.readline().strip() != 'ready':
+        p.kill()
+        p.wait()
+        return None
+    __compiler_workers_stats['starts'] += 1
+    __compiler_workers_stats['startup_time'] += time.time() - t
+    return {'process': p, 'requests': 0}
+
+
+def __acquire_compiler_worker():
+    try:
+        return __compiler_workers['idle'].get_nowait()
+    except Queue.Empty:
+        pass
+    with __compiler_workers['lock']:
+        can_start = __compiler_workers['started'] < __compiler_workers['max']
+        if can_start:
+            __compiler_workers['started'] += 1
+    if not can_start:
+        return __compiler_workers['idle'].get()
+    worker = __start_compiler_worker()
+    if worker is None:
+        # worker can't be started in this environment, stop trying
+        __compiler_workers['max'] = 0
+    else:
+        __compiler_workers['all'].append(worker)
+    return worker
+
+
+def __call_compiler_worker(commands):
+    # returns None if the request can't be processed by a worker
+    worker = __acquire_compiler_worker()
+    if worker is None:
+        return None
+    args = __split_console_commands(commands)
+    args = args[args.index('-jar') + 2:]
+    request = ['%d\n' % len(args)]
+    for arg in args:
+        arg = arg.encode('utf-8') if isinstance(arg, unicode) else arg
+        request.append('%d\n%s' % (len(arg), arg))
+
+    t = time.time()
+    p = worker['process']
+    try:
+        p.stdin.write(''.join(request))
+        p.stdin.flush()
+        code = int(p.stdout.readline())
+        output = p.stdout.read(int(p.stdout.readline()))
+    except (IOError, ValueError):
+        # broken worker is not returned to the pool
+        p.kill()
+        p.wait()
+        __compiler_workers['all'].remove(worker)
+        with __compiler_workers['lock']:
+            __compiler_workers['started'] -= 1
+        return None
+
+    kind = 'warm' if worker['requests'] else 'cold'
+    __compiler_workers_stats[kind] += 1
+    __compiler_workers_stats[kind + '_time'] += time.time() - t
+    worker['requests'] += 1
+    __compiler_workers['idle'].put(worker)
+    return code, output
+
+
+def __stop_compiler_workers():
+    for worker in __compiler_workers['all']:
+        worker['process'].stdin.close()
+        worker['process'].wait()
+    __compiler_workers['all'] = []
+    __print_compiler_workers_report()
+
+
+def __pop_compiler_workers_stats():
+    res = dict(__compiler_workers_stats)
+    __compiler_workers_stats.clear()
+    return res
+
+
+def __merge_compiler_workers_stats(stats):
+    for key, value in stats.iteritems():
+        __compiler_workers_stats[key] += value
+
+
+def __print_compiler_workers_report():
+    stats = __compiler_workers_stats
+    starts = stats['starts']
+    if not starts:
+        return
+    startup = stats['startup_time'] / starts
+    cold = stats['cold_time'] / stats['cold'] if stats['cold'] else 0
+    warm = stats['warm_time'] / stats['warm'] if stats['warm'] else 0
+    print '\nCompiler workers: %i requests served by %i JVMs, %i fallback calls' % \
+          (stats['cold'] + stats['warm'], starts, stats['fallbacks'])
+    print '  JVM startup: {:.3f} sec avg, first request: {:.3f} sec avg, warm request: {:.3f} sec avg'.format(
+        startup, cold, warm)
+    # each warm request would pay JVM startup and warm-up if started in a new process
+    print '  Saved by warm reuse: {:.3f} sec'.format(max(stats['warm'] * (startup + cold - warm), 0))
+
+
 # endregion
 # region --- Building
 # ======================================================================================================================
 # Building
 # ======================================================================================================================
+def __get_parts_files(modules, theme_name='none'):
+    # files of each part in build order, a file belongs to the first part that requires it
+    files = {}
+    return collections.OrderedDict((module_name, __make_manifest(module_name, files, theme_name, quiet=True))
+                                   for module_name in modules)
+
+
 def __create_opt_dummy(module_name):
     target_dir = os.path.join(OUT_PATH, 'tmp')
     __create_dir_if_not_exists(target_dir)
@@ -623,34 +1556,22 @@ def __create_opt_dummy(module_name):
     return f_name
 
 
-def __make_manifest(module_name, files, theme_name='none', gen_manifest=False, add_opt_dummy=False):
+@traced('manifest', 'module_name')
+def __make_manifest(module_name, files, theme_name='none', gen_manifest=False, add_opt_dummy=False, quiet=False):
     man_file = os.path.join(OUT_PATH, '%s.manifest.txt' % module_name)
     # output_file = os.path.join(OUT_PATH, '%s.tmp.js' % module_name)
-    print '  Building manifest for "%s"' % module_name
+    if not quiet:
+        print '  Building manifest for "%s"' % module_name
 
     descriptor = __get_modules_config()['parts'][module_name]
     entry_point = descriptor['entry']
 
-    deps = __parse_deps()
     all_files = [__create_opt_dummy(module_name)] if add_opt_dummy else []
     all_files.append(os.path.join(CLOSURE_SOURCE_PATH, 'base.js'))
-    placed_ns = set()
-
-    def put_in_order(name):
-        dep = deps.get(name, None)
-        if dep is None:
-            raise Exception('Unknown namespace %s requested for %s entry point' % (name, entry_point))
-        if len(dep[1]) > 0 and name not in placed_ns:
-            for provide in dep[1]:
-                placed_ns.add(provide)
-            for requirement in dep[2]:
-                put_in_order(requirement)
-            all_files.append(dep[0])
-
-    put_in_order(entry_point)
+    all_files.extend(__resolve_ns_files(entry_point))
 
     # if theme_name is not None and theme_name is not 'none':
-    #     put_in_order(__get_theme_entry_point(theme_name))
+    #     all_files.extend(__resolve_ns_files(__get_theme_entry_point(theme_name)))
 
     module_files = []
     for line in all_files:
@@ -687,8 +1608,10 @@ def __make_manifest(module_name, files, theme_name='none', gen_manifest=False, a
 
 
 @stopwatch()
+@traced('build', 'build_name', 'checks_only')
 def __make_build(build_name, modules, checks_only=False, theme_name='none', dev_edition=False, perf_mon=False,
-                 gen_manifest=False, debug_files=False, output=OUT_PATH, is_amd=False, is_release=False):
+                 gen_manifest=False, debug_files=False, output=OUT_PATH, is_amd=False, is_release=False,
+                 use_cache=True, source_maps=False):
     modules_parts_output = os.path.join(output, 'parts')
     __create_dir_if_not_exists(modules_parts_output)
     print '\nBuilding manifests for target "%s" (%s parts) to %s' % (build_name, len(modules), modules_parts_output)
@@ -698,6 +1621,15 @@ def __make_build(build_name, modules, checks_only=False, theme_name='none', dev_
         '--rename_prefix_namespace="$"',
         '--rewrite_polyfills="false"'
     ]
+    if source_maps:
+        # %outname% is replaced with the part output path without extension, e.g. out/parts/core.map
+        additional_flags.append('--create_source_map "%outname%.map"')
+    elif not checks_only:
+        # maps of the previous builds don't match the new parts
+        for module_name in modules:
+            map_path = os.path.join(modules_parts_output, '%s.map' % module_name)
+            if os.path.exists(map_path):
+                os.remove(map_path)
     if gen_manifest:
         # additional_flags.append('--formatting="PRETTY_PRINT"')
         # additional_flags.append('--formatting="PRINT_INPUT_DELIMITER"')
@@ -724,14 +1656,37 @@ def __make_build(build_name, modules, checks_only=False, theme_name='none', dev_
                 files_list.write(line)
         files_list.write('\n'.join(map(lambda f: '--js="%s"' % f, all_files)))
 
+    # release builds have own version, see __get_build_version
+    version = __get_build_version(is_release)
+
+    # manifests and debug files are not cached, so such builds always call the compiler.
+    # Parts output path (first additional flag) doesn't affect parts content and is not a part of the key.
+    cache_key = None
+    cached_modules = [] if checks_only else modules
+    if use_cache and not gen_manifest and not debug_files:
+        cache_key = __get_build_cache_key(all_files, additional_flags[1:],
+                                          [version, is_release, checks_only, dev_edition, perf_mon, theme_name])
+        errors = __restore_build_from_cache(cache_key, cached_modules, modules_parts_output)
+        if errors is not None:
+            print '  Module binaries restored from cache %s' % cache_key
+            if errors:
+                print errors
+            __collect_diagnostics(errors, target=build_name)
+            os.remove(files_list_file_name)
+            return errors
+
     print '  %s module binaries' % ('Checking' if checks_only else 'Building')
-    (err_code, errors) = __compile(js_files=False, version=True, dev_edition=dev_edition, perf_mon=perf_mon,
+    (err_code, errors) = __compile(js_files=False, version=version, dev_edition=dev_edition, perf_mon=perf_mon,
                                    additional_params=additional_flags, checks_only=checks_only,
                                    debug_files=build_name if debug_files else None, flag_file=files_list_file_name)
+    __collect_diagnostics(errors, target=build_name)
     if err_code:
-        print errors
+        # compiler output has already been shown
         sys.exit(1)
 
+    if cache_key is not None:
+        __store_build_in_cache(cache_key, cached_modules, modules_parts_output, errors)
+
     if gen_manifest:
         with open(MANIFEST_OUT_PATH, 'w') as f:
             f.write(json.dumps(files))
@@ -746,9 +1701,29 @@ def __make_build(build_name, modules, checks_only=False, theme_name='none', dev_
     return errors
 
 
+def __make_builds_parallel(targets, build_kwargs, jobs):
+    print '\nBuilding %s targets in %s parallel jobs' % (len(targets), min(jobs, len(targets)))
+    tasks = [('__make_build', (build_name, build), build_kwargs) for (build_name, build) in targets]
+    failed = []
+    cancelled = []
+    for (build_name, build), (code, errors, output) in zip(targets, __run_in_pool(tasks, jobs,
+                                                                                  __diagnostics['fail_fast'])):
+        sys.stdout.write(output)
+        if code is None:
+            cancelled.append(build_name)
+        elif code:
+            failed.append(build_name)
+    if cancelled:
+        print 'Compilation cancelled for targets: %s' % ', '.join(cancelled)
+    if failed:
+        print 'Compilation failed for targets: %s' % ', '.join(failed)
+        sys.exit(1)
+
+
 @stopwatch()
-def __make_bundle(bundle_name, modules, dev_edition=False, perf_mon=False, debug_files=False, gzip=False, stat=False,
-                  output=OUT_PATH, is_amd=False, is_release=False):
+@traced('bundle', 'bundle_name', 'is_amd')
+def __make_bundle(bundle_name, modules, dev_edition=False, perf_mon=False, debug_files=False, stat=False,
+                  output=OUT_PATH, is_amd=False, is_release=False, source_maps=False):
     print ''
     modules_parts_output = os.path.join(output, 'parts')
     postfix = '.amd' if is_amd else ''
@@ -766,20 +1741,91 @@ def __make_bundle(bundle_name, modules, dev_edition=False, perf_mon=False, debug
                                                   str(dev_edition).lower(),
                                                   str(perf_mon).lower())
 
-    wrapper = __get_bundle_wrapper(bundle_name, modules, file_name, perf_mon, debug_files, stat, is_amd, is_release)
-    with open(file_name, 'w') as output:
+    source_maps = source_maps and not stat
+    wrapper = __get_bundle_wrapper(bundle_name, modules, file_name, perf_mon, source_maps, stat, is_amd, is_release)
+    __write_bundle_file(file_name, wrapper, modules_parts_output, modules)
+    if source_maps:
+        __write_bundle_source_map(file_name, wrapper, modules_parts_output, modules)
+
+
+# Parts binaries read during the run: path -> (mtime, size, content).
+# Bundles share parts, so each part is read from disk once and written to bundles as a single block.
+__parts_contents = {}
+
+__assembly_stats = collections.defaultdict(float)
+
+
+def __read_part(path):
+    stat = os.stat(path)
+    cached = __parts_contents.get(path)
+    if cached is None or cached[0] != stat.st_mtime or cached[1] != stat.st_size:
+        with open(path, 'rb') as f:
+            cached = __parts_contents[path] = (stat.st_mtime, stat.st_size, f.read())
+        __assembly_stats['parts_read'] += 1
+    else:
+        __assembly_stats['parts_reused'] += 1
+    return cached[2]
+
+
+def __write_bundle_file(file_name, wrapper, parts_output, modules):
+    t = time.time()
+    with open(file_name, 'wb') as output:
         output.write(wrapper[0])
         for module_name in modules:
-            with open(os.path.join(modules_parts_output, '%s.js' % module_name)) as f:
-                for line in f:
-                    output.write(line)
+            output.write(__read_part(os.path.join(parts_output, '%s.js' % module_name)))
         output.write(wrapper[1])
+    __assembly_stats['bundles'] += 1
+    __assembly_stats['time'] += time.time() - t
 
-    if gzip:
-        __gzip_file(file_name)
 
+def __get_text_end_position(text, position=(0, 0)):
+    # (line, column) after the text written at position, columns are counted in characters as in source maps
+    lines = text.count('\n')
+    last_line = text[text.rfind('\n') + 1:].decode('utf-8', 'replace')
+    return (position[0] + lines, len(last_line) if lines else position[1] + len(last_line))
 
-def __get_bundle_wrapper(bundle_name, modules, file_name='', performance_monitoring=False, debug_files=False,
+
+@traced('bundle_source_map')
+def __write_bundle_source_map(file_name, wrapper, parts_output, modules):
+    # Indexed source map of the bundle: a section with the part source map for each part, placed where the part
+    # starts after the wrapper header and the previous parts.
+    map_dir = os.path.dirname(file_name)
+    sections = []
+    position = __get_text_end_position(wrapper[0])
+    for module_name in modules:
+        map_path = os.path.join(parts_output, '%s.map' % module_name)
+        if not os.path.exists(map_path):
+            print '  No source map found for part "%s", bundle source map is not created' % module_name
+            return
+        with open(map_path, 'r') as f:
+            part_map = json.load(f)
+        part_map['file'] = '%s.js' % module_name
+        part_map['sources'] = [os.path.relpath(path if os.path.isabs(path) else os.path.join(PROJECT_PATH, path),
+                                               map_dir).replace('\\', '/') for path in part_map['sources']]
+        sections.append({'offset': {'line': position[0], 'column': position[1]}, 'map': part_map})
+        position = __get_text_end_position(__read_part(os.path.join(parts_output, '%s.js' % module_name)), position)
+
+    with open(file_name + '.map', 'w') as f:
+        json.dump({'version': 3, 'file': os.path.basename(file_name), 'sections': sections}, f)
+    print '  Source map: %s.map' % file_name
+
+
+def __print_assembly_stats():
+    stats = __assembly_stats
+    print '\nAssembled {:.0f} bundles in {:.3f} sec: {:.0f} parts read from disk, {:.0f} reused from memory'.format(
+        stats['bundles'], stats['time'], stats['parts_read'], stats['parts_reused'])
+
+
+@memoize(files=lambda: [BINARIES_WRAPPER_START, BINARIES_WRAPPER_END, AMD_WRAPPER_START, AMD_WRAPPER_END])
+def __get_wrapper_templates():
+    res = {}
+    for path in (BINARIES_WRAPPER_START, BINARIES_WRAPPER_END, AMD_WRAPPER_START, AMD_WRAPPER_END):
+        with open(path, 'r') as f:
+            res[path] = f.read()
+    return res
+
+
+def __get_bundle_wrapper(bundle_name, modules, file_name='', performance_monitoring=False, source_map=False,
                          stat=False, is_amd=False, is_release=False):
     if stat:
         return '', ''
@@ -794,17 +1840,11 @@ def __get_bundle_wrapper(bundle_name, modules, file_name='', performance_monitor
                    "((typeof window.performance=='object')&&(typeof window.performance.now=='function')?" \
                    "window.performance.now():+new Date()-window.%s_init_start).toFixed(5),'ms');" \
                    "delete window.%s_init_start;" % (camel_case_bundle_name, camel_case_bundle_name, camel_case_bundle_name)
-    source_mapping = ('//# sourceMappingURL=%s.map' % file_name) if debug_files else ''
+    # the comment must be on its own line after the code, so it is not placed into the wrapper template
+    source_mapping = ('\n//# sourceMappingURL=%s.map\n' % os.path.basename(file_name)) if source_map else ''
 
-    wrapper_start = AMD_WRAPPER_START if is_amd else BINARIES_WRAPPER_START
-    f = open(wrapper_start, 'r')
-    start = f.read()
-    f.close()
-
-    wrapper_end = AMD_WRAPPER_END if is_amd else BINARIES_WRAPPER_END
-    f = open(wrapper_end, 'r')
-    end = f.read()
-    f.close()
+    start = __get_wrapper_templates()[AMD_WRAPPER_START if is_amd else BINARIES_WRAPPER_START]
+    end = __get_wrapper_templates()[AMD_WRAPPER_END if is_amd else BINARIES_WRAPPER_END]
 
     core_check = '' \
         if any(map(lambda item: __get_modules_config()['parts'][item].get('skipCoreCheck', False), modules)) \
@@ -820,16 +1860,415 @@ def __get_bundle_wrapper(bundle_name, modules, file_name='', performance_monitor
         perf_start,
         core_check
     )
-    end = end % (perf_end, source_mapping)
+    end = end % (perf_end, '') + source_mapping
 
     return start, end
 
 
+@traced('bundles')
+def __make_bundles(builds, output, params, changed_parts=None):
+    # Assembles bundles of the build targets and writes modules.json and resources.json.
+    # If changed_parts is passed, only bundles containing these parts are assembled again.
+    module_configs = __get_modules_config()['parts']
+    bundles = __get_modules_config()['modules']
+    built_bundles = collections.OrderedDict()
+    __assembly_stats.clear()
+    for bundle_name, bundle in bundles.iteritems():
+        if all(map(lambda module_name: __get_build_name(module_configs[module_name]) in builds, bundle['parts'])):
+            built_bundles[bundle_name] = bundle['parts']
+        elif changed_parts is None:
+            print 'Skipping bundle "%s"' % bundle_name
+    for build_name, build in __get_builds().iteritems():
+        if build_name in builds:
+            built_bundles['anychart-' + build_name] = build
+
+    for bundle_name, parts in built_bundles.iteritems():
+        if changed_parts is None or any(part in changed_parts for part in parts):
+            __make_bundle(bundle_name, parts, params['develop'], params['performance_monitoring'],
+                          params['debug_files'], output=output, is_amd=params['is_amd'],
+                          is_release=params['is_release'],
+                          source_maps=params['source_maps'] or params['debug_files'])
+    __print_assembly_stats()
+
+    with __trace_span('index', file='modules.json'):
+        return __write_bundles_index(built_bundles, output, params)
+
+
+def __write_bundles_index(built_bundles, output, params):
+    # writes modules.json and resources.json
+    module_configs = __get_modules_config()['parts']
+    bundles = __get_modules_config()['modules']
+    modules_json = {'parts': {}, 'modules': {}}
+
+    for part, part_config in module_configs.iteritems():
+        modules_json['parts'][part] = {'deps': part_config.get('deps', [])}
+    for bundle, parts in built_bundles.iteritems():
+        modules_json['modules'][bundle] = {'parts': parts}
+        if bundle in bundles:
+            if 'type' in bundles[bundle]: modules_json['modules'][bundle]['type'] = bundles[bundle]['type']
+            if 'name' in bundles[bundle]: modules_json['modules'][bundle]['name'] = bundles[bundle]['name']
+            if 'icon' in bundles[bundle]: modules_json['modules'][bundle]['icon'] = bundles[bundle]['icon']
+            if 'docs' in bundles[bundle]: modules_json['modules'][bundle]['docs'] = bundles[bundle]['docs']
+            if 'desc' in bundles[bundle]: modules_json['modules'][bundle]['desc'] = bundles[bundle]['desc']
+
+            if params['is_amd']:
+                bundle_path = os.path.join(output, 'amd', bundle + '.amd.min.js')
+            else:
+                bundle_path = os.path.join(output, bundle + '.min.js')
+
+            modules_json['modules'][bundle]['size'] = __get_gzip_file_size(bundle_path)
+        elif bundle == 'anychart-bundle':
+            modules_json['modules'][bundle]['name'] = 'AnyChart Bundle'
+            modules_json['modules'][bundle]['type'] = 'bundle'
+            modules_json['modules'][bundle]['desc'] = 'AnyChart Bundle module'
+            modules_json['modules'][bundle]['docs'] = 'https://docs.anychart.com/Quick_Start/Modules#bundle'
+
+    with open(os.path.join(output, 'modules.json'), 'w') as f:
+        f.write(json.dumps(modules_json))
+
+    # resource_json = {'modules': modules_json, 'addons': {}, 'css': {}, 'fonts': {}}
+    resource_json = {}
+    # resource_json['modules'] = modules_json
+    # resource_json['css'] = build_css_indexes()
+    # resource_json['fonts'] = build_fonts_indexes()
+
+    # We are still need to generate resources.json with themes
+    # section cause /bin/sources/modules.json are not presented
+    # on cdn.
+    # resources.json will be overwritten on cdn
+    resource_json['themes'] = __get_modules_config()['themes']
+    # resource_json['locales'] = build_locales_indexes()
+    # resource_json['geodata'] = build_geodata_indexes()
+    # resource_json['addons'] = [ {'name': 'anychart-chart-editor.min.js'},
+    #                             {'name': 'graphics.js'},
+    #                             {'name': 'graphics.min.js'} ]
+
+    with open(os.path.join(output, 'resources.json'), 'w') as f:
+        f.write(json.dumps(resource_json))
+
+    return built_bundles
+
+
+def __get_size_budgets(built_bundles):
+    # Gzipped size budgets in Kb: "budget" of bundles and parts in modules config, "budgets" section of the
+    # config holds defaults for "modules" and "parts". Defaults are not applied to build targets bundles.
+    config = __get_modules_config()
+    defaults = config.get('budgets', {})
+    budgets = collections.OrderedDict()
+    for bundle_name in built_bundles:
+        bundle = config['modules'].get(bundle_name)
+        if bundle is not None:
+            budget = bundle.get('budget', defaults.get('modules'))
+            if budget is not None:
+                budgets[('module', bundle_name)] = budget
+    parts = sorted(set(part for parts in built_bundles.itervalues() for part in parts))
+    for part in parts:
+        budget = config['parts'][part].get('budget', defaults.get('parts'))
+        if budget is not None:
+            budgets[('part', part)] = budget
+    return budgets
+
+
+def __check_size_budgets(built_bundles, output, is_amd):
+    # Returns a list of (kind, name, size, budget) for exceeded budgets, sizes are in bytes.
+    exceeded = []
+    budgets = __get_size_budgets(built_bundles)
+    for ((kind, name), budget) in budgets.iteritems():
+        if kind == 'part':
+            path = os.path.join(output, 'parts', '%s.js' % name)
+        elif is_amd:
+            path = os.path.join(output, 'amd', name + '.amd.min.js')
+        else:
+            path = os.path.join(output, name + '.min.js')
+        size = __get_gzip_size(path)
+        if size > budget * 1000:
+            exceeded.append((kind, name, size, budget))
+
+    if budgets:
+        print '\nSize budgets: %s checked, %s exceeded' % (len(budgets), len(exceeded))
+    for (kind, name, size, budget) in exceeded:
+        print '  {:<6} {:<40} {:>10.1f}Kb gzipped, budget {}Kb (+{:.1f}Kb)'.format(
+            kind, name, size / 1000.0, budget, size / 1000.0 - budget)
+    return exceeded
+
+
+# endregion
+# region --- Hashed outputs
+# ======================================================================================================================
+# Hashed outputs
+# ======================================================================================================================
+ASSETS_MANIFEST_NAME = 'assets.json'
+
+
+def __get_hashed_name(file_name, content_hash):
+    # anychart-base.min.js -> anychart-base.<hash>.min.js
+    parts = file_name.split('.', 1)
+    return '.'.join([parts[0], content_hash] + parts[1:])
+
+
+def __get_stale_hashed_files(output, manifest):
+    # Hashed copies of the names from the manifest with other hashes, and hashed files of the previous
+    # assets.json which are not in the new one, e.g. of bundles not built anymore.
+    current = set(os.path.join(output, *item['file'].split('/')) for item in manifest.itervalues())
+    stale = set()
+    for name in manifest:
+        path = os.path.join(output, *name.split('/'))
+        parts = os.path.basename(path).split('.', 1)
+        pattern = re.compile(r'^%s\.[0-9a-f]{10}%s$' % (re.escape(parts[0]),
+                                                        re.escape('.' + parts[1]) if len(parts) > 1 else ''))
+        for file_name in os.listdir(os.path.dirname(path)):
+            if pattern.match(file_name):
+                stale.add(os.path.join(os.path.dirname(path), file_name))
+    manifest_path = os.path.join(output, ASSETS_MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r') as f:
+                previous = json.load(f)
+            stale.update(os.path.join(output, *item['file'].split('/')) for item in previous.itervalues())
+        except (ValueError, KeyError, TypeError):
+            pass
+    return sorted(path for path in stale - current if os.path.exists(path))
+
+
+def __get_sri_hash(data):
+    import base64
+
+    return 'sha384-' + base64.b64encode(hashlib.sha384(data).digest())
+
+
+@traced('hashed_outputs')
+def __write_hashed_outputs(built_bundles, output, is_amd):
+    # Copies bundles, parts and css to names with the content hash, so they can be served as immutable, and writes
+    # assets.json: logical name -> {"file": hashed name, "integrity": SRI hash, "size": bytes, "gzip": bytes}.
+    # Names are relative to the output folder. Only hashed files of the new assets.json are kept, copies of the
+    # previous builds are removed, so they are not compressed and purged from CDN with the release.
+    names = [('amd/%s.amd.min.js' if is_amd else '%s.min.js') % bundle_name for bundle_name in built_bundles]
+    names.extend('parts/%s.js' % part for part in sorted(set(part for parts in built_bundles.itervalues()
+                                                                for part in parts)))
+    names.extend(name for name in ('anychart-ui.css', 'anychart-ui.min.css')
+                 if os.path.exists(os.path.join(output, name)))
+
+    manifest = collections.OrderedDict()
+    for name in names:
+        path = os.path.join(output, *name.split('/'))
+        with open(path, 'rb') as f:
+            data = f.read()
+        hashed_name = __get_hashed_name(os.path.basename(path), hashlib.sha1(data).hexdigest()[:10])
+        hashed_path = os.path.join(os.path.dirname(path), hashed_name)
+        if not os.path.exists(hashed_path):
+            with open(hashed_path, 'wb') as f:
+                f.write(data)
+        manifest[name] = collections.OrderedDict([
+            ('file', '/'.join(name.split('/')[:-1] + [hashed_name])),
+            ('integrity', __get_sri_hash(data)),
+            ('size', len(data)),
+            ('gzip', __get_gzip_size(path))
+        ])
+
+    stale = __get_stale_hashed_files(output, manifest)
+    for path in stale:
+        os.remove(path)
+        # compressed copies of the previous builds
+        for (ext, level, compress) in COMPRESSION_CODECS.itervalues():
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+
+    with open(os.path.join(output, ASSETS_MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print 'Hashed names of %s files written to %s, %s outdated hashed files removed' % (
+        len(manifest), os.path.join(output, ASSETS_MANIFEST_NAME), len(stale))
+    return manifest
+
+
+# endregion
+# region --- Build cache
+# ======================================================================================================================
+# Build cache
+# ======================================================================================================================
+def __get_build_cache_key(files, flags, defines):
+    # files are hashed by content, so touching a file doesn't invalidate the cache
+    h = hashlib.sha1()
+    for item in [COMPILER_VERSION, str(os.path.getsize(COMPILER_PATH))] + map(str, defines) + flags:
+        h.update(item)
+        h.update('\0')
+    for path in [CHECKS_FLAGS, COMMON_FLAGS] + files:
+        h.update(path)
+        h.update(__get_file_hash(path))
+    return h.hexdigest()
+
+
+def __get_cached_part_files(module_name):
+    # source maps are a part of the entry only if the build creates them
+    return ['%s.js' % module_name, '%s.map' % module_name]
+
+
+@traced('cache.restore')
+def __restore_build_from_cache(key, modules, parts_output):
+    entry = os.path.join(BUILD_CACHE_PATH, key)
+    if not os.path.isdir(entry):
+        return None
+    for module_name in modules:
+        for file_name in __get_cached_part_files(module_name):
+            if os.path.exists(os.path.join(entry, file_name)):
+                shutil.copyfile(os.path.join(entry, file_name), os.path.join(parts_output, file_name))
+    with open(os.path.join(entry, 'output.txt'), 'r') as f:
+        output = f.read()
+    # entry modification time is used as last access time for the eviction
+    os.utime(entry, None)
+    return output
+
+
+@traced('cache.store')
+def __store_build_in_cache(key, modules, parts_output, output):
+    entry = os.path.join(BUILD_CACHE_PATH, key)
+    tmp_entry = '%s.%s.tmp' % (entry, os.getpid())
+    if not os.path.exists(BUILD_CACHE_PATH):
+        os.makedirs(BUILD_CACHE_PATH)
+    __create_dir_if_not_exists(tmp_entry)
+    for module_name in modules:
+        for file_name in __get_cached_part_files(module_name):
+            if os.path.exists(os.path.join(parts_output, file_name)):
+                shutil.copyfile(os.path.join(parts_output, file_name), os.path.join(tmp_entry, file_name))
+    with open(os.path.join(tmp_entry, 'output.txt'), 'w') as f:
+        f.write(output)
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # stored by another process
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+    __evict_build_cache()
+
+
+def __evict_build_cache():
+    entries = []
+    for name in os.listdir(BUILD_CACHE_PATH):
+        path = os.path.join(BUILD_CACHE_PATH, name)
+        if name.endswith('.tmp') or not os.path.isdir(path):
+            continue
+        try:
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+        except OSError:
+            pass
+    total = sum(entry[1] for entry in entries)
+    for (mtime, size, path) in sorted(entries):
+        if total <= BUILD_CACHE_SIZE_LIMIT * 1024 * 1024:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+# endregion
+# region --- Compression
+# ======================================================================================================================
+# Compression
+# ======================================================================================================================
+def __gzip_data(data, level):
+    # zero mtime makes output the same for the same content
+    res = StringIO.StringIO()
+    with gzip.GzipFile('', 'wb', level, res, mtime=0) as f:
+        f.write(data)
+    return res.getvalue()
+
+
+def __deflate_data(data, level):
+    # raw deflate stream, no zlib header
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def __zlib_data(data, level):
+    # zlib wrapped deflate, as HTTP 'deflate' content encoding is specified
+    return zlib.compress(data, level)
+
+
+# codec name -> (compressed file extension, default level, compress function)
+COMPRESSION_CODECS = collections.OrderedDict([
+    ('gzip', ('.gz', 9, __gzip_data)),
+    ('deflate', ('.deflate', 9, __deflate_data)),
+    ('zlib', ('.zz', 9, __zlib_data))
+])
+
+
+def __get_compression_codecs(params):
+    # returns list of (codec, level) from --compress values, --gzip is a shortcut for "gzip" codec
+    specs = list(params.get('compress') or [])
+    if params.get('gzip'):
+        specs.append('gzip')
+    res = collections.OrderedDict()
+    for spec in specs:
+        (name, sep, level) = spec.partition(':')
+        if name not in COMPRESSION_CODECS:
+            raise Exception('Unknown compression codec %s. Available codecs: %s' %
+                            (name, ', '.join(COMPRESSION_CODECS.keys())))
+        res[name] = int(level) if level else COMPRESSION_CODECS[name][1]
+    return res.items()
+
+
+def __get_compressible_outputs(output):
+    res = []
+    for path in (output, os.path.join(output, 'amd')):
+        if os.path.isdir(path):
+            for file_name in sorted(os.listdir(path)):
+                file_path = os.path.join(path, file_name)
+                if file_name.endswith(('.js', '.css')) and os.path.isfile(file_path):
+                    res.append(file_path)
+    return res
+
+
+@traced('compress', 'path', 'codec')
+def __compress_file(path, codec, level, cached_key):
+    # returns (compressed file path, content key, whether file was written)
+    with open(path, 'rb') as f:
+        data = f.read()
+    (ext, default_level, compress) = COMPRESSION_CODECS[codec]
+    target = path + ext
+    key = '%s:%s:%s' % (codec, level, hashlib.sha1(data).hexdigest())
+    if key == cached_key and os.path.exists(target):
+        return target, key, False
+    with open(target, 'wb') as f:
+        f.write(compress(data, level))
+    return target, key, True
+
+
+@stopwatch('  ')
+def __compress_files(files, codecs, jobs=None):
+    # files are compressed in a threads pool, zlib releases GIL while compressing
+    import multiprocessing.pool
+
+    print '\nCompressing %s files: %s' % (len(files), ', '.join('%s:%s' % codec for codec in codecs))
+    try:
+        with open(COMPRESSION_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (IOError, ValueError):
+        cache = {}
+
+    tasks = [(path, codec, level, cache.get(path + COMPRESSION_CODECS[codec][0]))
+             for path in files if os.path.exists(path)
+             for (codec, level) in codecs]
+    pool = multiprocessing.pool.ThreadPool(jobs if jobs > 1 else multiprocessing.cpu_count())
+    try:
+        results = pool.map(lambda task: __compress_file(*task), tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+    written = 0
+    for (target, key, is_written) in results:
+        cache[target] = key
+        written += is_written
+    __create_dir_if_not_exists(OUT_PATH)
+    with open(COMPRESSION_CACHE_PATH, 'w') as f:
+        json.dump(cache, f)
+    print '  %s files written, %s unchanged' % (written, len(results) - written)
+
+
 # endregion
 # region --- Locales index building
 # ======================================================================================================================
 # Locales index building
 # ======================================================================================================================
+@traced('index.locales')
 def build_locales_indexes():
     locales_path = os.path.join(PROJECT_PATH, 'dist', 'locales')
     result = {}
@@ -854,6 +2293,7 @@ def build_locales_indexes():
 # ======================================================================================================================
 # Geodata index building
 # ======================================================================================================================
+@traced('index.geodata')
 def build_geodata_indexes():
     geo_data_path = os.path.join(PROJECT_PATH, 'dist', 'geodata')
     result = {}
@@ -882,6 +2322,7 @@ def build_geodata_indexes():
 # ======================================================================================================================
 # CSS index building
 # ======================================================================================================================
+@traced('index.css')
 def build_css_indexes():
     css_data_path = os.path.join(PROJECT_PATH, 'dist', 'css')
     result = []
@@ -897,6 +2338,7 @@ def build_css_indexes():
 # ======================================================================================================================
 # Fonts index building
 # ======================================================================================================================
+@traced('index.fonts')
 def build_fonts_indexes():
     fonts_data_path = os.path.join(PROJECT_PATH, 'dist', 'fonts')
     result = {}
@@ -922,12 +2364,18 @@ def build_fonts_indexes():
 # ======================================================================================================================
 # Themes building
 # ======================================================================================================================
-def build_theme(theme, output):
+def __compile_theme(theme, output):
     min_file_name = os.path.join(output, theme + '.min.js')
-    file_name = os.path.join(output, theme + '.js')
     (err, output) = __compile(__get_theme_entry_point(theme), min_file_name, flag_file=CHECKS_FLAGS)
-    if len(output) > 0:
-        print output
+    __collect_diagnostics(output, target='theme %s' % theme)
+    if err:
+        print 'Theme "%s" compilation failed' % theme
+        sys.exit(1)
+
+
+def __beautify_theme(theme, output):
+    min_file_name = os.path.join(output, theme + '.min.js')
+    file_name = os.path.join(output, theme + '.js')
     try:
         import jsbeautifier
         res = jsbeautifier.beautify_file(min_file_name)
@@ -937,6 +2385,858 @@ def build_theme(theme, output):
         raise ImportError('Please install jsbeautifier manually first.')
 
 
+def __call_timed(func_name, prefix, *args):
+    return stopwatch(prefix)(globals()[func_name])(*args)
+
+
+@traced('theme', 'theme')
+def build_theme(theme, output):
+    __compile_theme(theme, output)
+    __beautify_theme(theme, output)
+
+
+def __build_themes_parallel(themes, output, jobs):
+    print 'Building themes (%i items) in %i parallel jobs' % (len(themes), min(jobs, len(themes)))
+    failed = []
+    # all themes are compiled first, beautifier runs in the second pool for successfully compiled ones
+    for (stage, title) in (('__compile_theme', 'Compiling'), ('__beautify_theme', 'Beautifying')):
+        stage_themes = [theme for theme in themes if theme not in failed]
+        if not stage_themes:
+            break
+        print '  %s themes' % title
+        tasks = [('__call_timed', (stage, '      ', theme, output), {}) for theme in stage_themes]
+        for theme, (code, res, log) in zip(stage_themes, __run_in_pool(tasks, jobs)):
+            print '    %s %s theme' % (title, theme)
+            sys.stdout.write(log)
+            if code:
+                failed.append(theme)
+
+    if failed:
+        print 'Failed to build themes: %s' % ', '.join(failed)
+        sys.exit(1)
+
+
+# endregion
+# region --- Watching
+# ======================================================================================================================
+# Watching
+# ======================================================================================================================
+def __get_watch_snapshot():
+    res = {}
+    for root in (SRC_PATH, GRAPHICS_SRC_PATH, CSS_SRC_PATH, SOURCES_PATH):
+        for (path, dirs, files) in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file_name in files:
+                if file_name.startswith('.'):
+                    continue
+                file_path = os.path.join(path, file_name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                res[file_path] = (stat.st_mtime, stat.st_size)
+    # deps file is written by the watcher itself
+    res.pop(ANYCHART_DEPS_PATH, None)
+    return res
+
+
+def __wait_for_changes(snapshot, interval, debounce):
+    # returns new snapshot, changed paths and the time the first change was noticed at
+    current = snapshot
+    while current == snapshot:
+        time.sleep(interval)
+        current = __get_watch_snapshot()
+    first_change_time = time.time()
+
+    # wait for the end of edits burst
+    while True:
+        time.sleep(debounce)
+        latest = __get_watch_snapshot()
+        if latest == current:
+            break
+        current = latest
+
+    changed = set(path for path in set(snapshot) | set(current) if snapshot.get(path) != current.get(path))
+    return current, changed, first_change_time
+
+
+def __watch_build_target(build_name, build, build_kwargs):
+    # returns parts which binaries were changed by the build or None if the build failed
+    parts_output = os.path.join(build_kwargs['output'], 'parts')
+
+    def get_hashes():
+        paths = dict((part, os.path.join(parts_output, '%s.js' % part)) for part in build)
+        return dict((part, __get_file_hash(path) if os.path.exists(path) else None) for (part, path) in paths.iteritems())
+
+    before = get_hashes()
+    (code, errors, output) = __call_captured('__make_build', (build_name, build), build_kwargs)
+    sys.stdout.write(output)
+    if code:
+        return None
+    after = get_hashes()
+    return set(part for part in build if before[part] != after[part])
+
+
+def __watch_rebuild(changed, state, builds, build_kwargs, params):
+    # changed is None for the initial build, everything is built in this case
+    everything = changed is None or any(path.startswith(SOURCES_PATH + os.sep) for path in changed)
+    output = build_kwargs['output']
+
+    if everything or any(path.endswith('.js') for path in changed):
+        __build_deps()
+        changed_parts = set()
+        failed = False
+        for build_name, build in __get_builds().iteritems():
+            if build_name not in builds:
+                continue
+            files = set(f for part_files in __get_parts_files(build, params['theme']).itervalues() for f in part_files)
+            # files removed from the target are checked too
+            if everything or changed & (files | state.get(build_name, set())):
+                target_changed_parts = __watch_build_target(build_name, build, build_kwargs)
+                if target_changed_parts is None:
+                    failed = True
+                else:
+                    state[build_name] = files
+                    changed_parts.update(target_changed_parts)
+
+        if failed:
+            print 'Build failed, bundles are not assembled'
+        elif everything or changed_parts:
+            print '\nAssembling bundles with changed parts: %s' % ('all' if everything else ', '.join(changed_parts))
+            __make_bundles(builds, output, params, None if everything else changed_parts)
+
+        if params['themes']:
+            for theme in __get_themes_list():
+                if everything or changed & set(__resolve_ns_files(__get_theme_entry_point(theme))):
+                    print 'Building %s theme' % theme
+                    (code, res, theme_output) = __call_captured('build_theme', (theme, output), {})
+                    sys.stdout.write(theme_output)
+
+    if params['css'] and (everything or any(path.startswith(CSS_SRC_PATH + os.sep) for path in changed)):
+        (code, res, css_output) = __call_captured('__compile_css', (), {'output': output, 'gzip': params['gzip'],
+                                                                        'compress': []})
+        sys.stdout.write(css_output)
+
+
+# endregion
+# region --- Affected targets
+# ======================================================================================================================
+# Affected targets
+# ======================================================================================================================
+def __get_reverse_index():
+    # source file -> namespaces -> parts -> bundles, plus standalone themes of source files
+    deps = __parse_deps()
+    modules_config = __get_modules_config()
+    builds = __get_builds()
+
+    file_namespaces = collections.defaultdict(list)
+    for (ns, (file_name, provides, requires)) in deps.iteritems():
+        file_namespaces[file_name].append(ns)
+
+    file_parts = collections.defaultdict(list)
+    for build in builds.itervalues():
+        for (part, files) in __get_parts_files(build).iteritems():
+            for file_name in files:
+                file_parts[file_name].append(part)
+
+    # parts are compiled together with parts they depend on, so changed part affects its dependents too
+    dependent_parts = collections.defaultdict(set)
+    for (part, part_config) in modules_config['parts'].iteritems():
+        for dependency in part_config['deps']:
+            dependent_parts[dependency].add(part)
+
+    part_bundles = collections.defaultdict(list)
+    for (bundle_name, bundle) in modules_config['modules'].iteritems():
+        for part in bundle['parts']:
+            part_bundles[part].append(bundle_name)
+    for (build_name, build) in builds.iteritems():
+        for part in build:
+            part_bundles[part].append('anychart-' + build_name)
+
+    file_themes = collections.defaultdict(list)
+    for theme in __get_themes_list():
+        for file_name in __resolve_ns_files(__get_theme_entry_point(theme)):
+            file_themes[file_name].append(theme)
+
+    return {
+        'namespaces': file_namespaces,
+        'parts': file_parts,
+        'dependentParts': dependent_parts,
+        'bundles': part_bundles,
+        'themes': file_themes
+    }
+
+
+def __get_affected(paths):
+    index = __get_reverse_index()
+    everything = False
+    css = False
+    namespaces = set()
+    parts = set()
+    themes = set()
+    for path in paths:
+        path = os.path.normpath(os.path.join(PROJECT_PATH, path))
+        if path.startswith(SOURCES_PATH + os.sep) or path == os.path.join(PROJECT_PATH, 'build.py'):
+            everything = True
+        elif path.startswith(CSS_SRC_PATH + os.sep):
+            css = True
+        elif path.endswith('.js') and path in index['namespaces']:
+            namespaces.update(index['namespaces'][path])
+            parts.update(index['parts'].get(path, []))
+            themes.update(index['themes'].get(path, []))
+        elif path.endswith('.js') and not os.path.exists(path) and \
+                (path.startswith(SRC_PATH + os.sep) or path.startswith(GRAPHICS_SRC_PATH + os.sep)):
+            # removed source file can't be found in deps anymore
+            everything = True
+        elif path == LIBS_PATH or path.startswith(LIBS_PATH + os.sep) or \
+                path == os.path.join(PROJECT_PATH, '.gitmodules'):
+            # submodule bump or lib change, any of the sources may depend on it
+            everything = True
+
+    if everything:
+        parts = set(__get_modules_config()['parts'].keys())
+        themes = set(__get_themes_list())
+        css = True
+    else:
+        queue = list(parts)
+        while queue:
+            for part in index['dependentParts'].get(queue.pop(), ()):
+                if part not in parts:
+                    parts.add(part)
+                    queue.append(part)
+
+    bundles = set(bundle for part in parts for bundle in index['bundles'].get(part, []))
+    return {
+        'all': everything,
+        'files': sorted(paths),
+        'namespaces': sorted(namespaces),
+        'parts': sorted(parts),
+        'bundles': sorted(bundles),
+        'themes': sorted(themes),
+        'css': css
+    }
+
+
+def __get_changed_files(since):
+    # submodules, like libs/graphicsjs, are listed by their paths
+    p = subprocess.Popen(['git', 'diff', '--name-only', '%s...HEAD' % since],
+                         stdout=subprocess.PIPE,
+                         stderr=subprocess.PIPE,
+                         cwd=PROJECT_PATH)
+    (output, err) = p.communicate()
+    if p.returncode:
+        raise Exception('Failed to get files changed since %s: %s' % (since, err.strip()))
+    return [line for line in output.splitlines() if line]
+
+
+# endregion
+# region --- Benchmarks
+# ======================================================================================================================
+# Benchmarks
+# ======================================================================================================================
+def __measure(func, iterations):
+    times = []
+    for i in range(iterations):
+        t = time.time()
+        func()
+        times.append(time.time() - t)
+    return times
+
+
+def __print_measure(title, times):
+    print '  {}: min {:.4f} sec, avg {:.4f} sec ({} runs)'.format(title, min(times), sum(times) / len(times),
+                                                                 len(times))
+
+
+def __bench_deps_index(iterations):
+    print 'Dependency index load time (%s, %s)' % (CLOSURE_DEPS_PATH, ANYCHART_DEPS_PATH)
+    cold = __measure(__parse_deps_files, iterations)
+    __save_deps_index(__get_deps_index_key(), __parse_deps_files())
+    warm = __measure(lambda: __load_deps_index(__get_deps_index_key()), iterations)
+    __print_measure('Cold (parsing deps files)', cold)
+    __print_measure('Warm (loading %s)' % DEPS_INDEX_PATH, warm)
+
+
+def __bench_assembly(iterations):
+    parts_output = os.path.join(OUT_PATH, 'parts')
+    bundles = [(bundle_name, bundle['parts']) for (bundle_name, bundle) in __get_modules_config()['modules'].iteritems()
+               if all(os.path.exists(os.path.join(parts_output, '%s.js' % part)) for part in bundle['parts'])]
+    if not bundles:
+        print 'Bundles assembly: no compiled parts found in %s, run compile first' % parts_output
+        return
+    tmp_path = os.path.join(OUT_PATH, 'tmp')
+    __create_dir_if_not_exists(tmp_path)
+    file_name = os.path.join(tmp_path, 'bench-bundle.min.js')
+    __get_build_version()
+
+    def legacy():
+        # parts are copied line by line, wrapper templates and branch name are got for each bundle
+        for (bundle_name, parts) in bundles:
+            __get_wrapper_templates.reset()
+            __get_current_branch_name.reset()
+            wrapper = __get_bundle_wrapper(bundle_name, parts, file_name)
+            with open(file_name, 'w') as output:
+                output.write(wrapper[0])
+                for part in parts:
+                    with open(os.path.join(parts_output, '%s.js' % part)) as f:
+                        for line in f:
+                            output.write(line)
+                output.write(wrapper[1])
+
+    def current():
+        __parts_contents.clear()
+        __get_wrapper_templates.reset()
+        __get_current_branch_name.reset()
+        for (bundle_name, parts) in bundles:
+            __write_bundle_file(file_name, __get_bundle_wrapper(bundle_name, parts, file_name), parts_output, parts)
+
+    print 'Bundles assembly (%s bundles from %s)' % (len(bundles), parts_output)
+    __print_measure('Line by line copy', __measure(legacy, iterations))
+    __print_measure('Shared parts buffers', __measure(current, iterations))
+    os.remove(file_name)
+
+
+def __bench_startup(iterations):
+    # time from the process start until the command arguments are parsed, with and without help text,
+    # and of the commands doing nothing but reading a file
+    print 'Startup time of the commands'
+    (parser, subparsers) = __create_parser()
+    script = os.path.join(PROJECT_PATH, 'build.py')
+    with open(os.devnull, 'w') as devnull:
+        __print_measure('Import only', __measure(
+            lambda: subprocess.call([sys.executable, '-c', 'import sys; sys.path.insert(0, %r); import build' %
+                                     PROJECT_PATH], stdout=devnull, stderr=devnull), iterations))
+        for command in subparsers.choices:
+            __print_measure('%s -h' % command, __measure(
+                lambda: subprocess.call([sys.executable, script, command, '-h'], stdout=devnull, stderr=devnull),
+                iterations))
+        for command in [['version'], ['version', '-m']]:
+            __print_measure(' '.join(command), __measure(
+                lambda: subprocess.call([sys.executable, script] + command, stdout=devnull, stderr=devnull),
+                iterations))
+
+
+BENCHMARKS = collections.OrderedDict([
+    ('deps_index', __bench_deps_index),
+    ('assembly', __bench_assembly),
+    ('startup', __bench_startup)
+])
+
+
+# endregion
+# region --- Size statistics
+# ======================================================================================================================
+# Size statistics
+# ======================================================================================================================
+STAT_DELIMITER = re.compile(r'^// (?:Input (\d+)|Module (.+?))\r?$', re.M)
+
+
+def __scan_stat_output(path, modules):
+    # Single pass over the compiled output: sizes of the inputs are distances between the delimiter lines.
+    # modules: {module_name: {'inputs': [[path, 0], ...]}}, sizes are written in place.
+    import mmap
+
+    with open(path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        curr_module = None
+        curr_input = None
+        curr_start = 0
+        for match in STAT_DELIMITER.finditer(data):
+            if curr_input is not None:
+                curr_input[1] = match.start() - curr_start
+            curr_start = match.end() + 1
+            if match.group(2) is not None:
+                curr_module = modules[match.group(2)]
+                curr_input = None
+            elif curr_module is None:
+                raise Exception('Found input delimiter before module delimiter')
+            else:
+                index = int(match.group(1))
+                curr_input = curr_module['inputs'][index]
+                if index == 0:
+                    curr_input.append(True)
+        if curr_input is not None:
+            curr_input[1] = max(len(data) - curr_start, 0)
+    finally:
+        data.close()
+
+
+def __get_stat_views(inputs, leaf_as_tree):
+    # inputs: [[path, size(, True)], ...]
+    # Returns inputsBySize, inputsByName and inputsTree views. Leaves of the tree are plain sizes for the
+    # module reports and [{}, size] nodes for the whole bundle report.
+    # Labels are per entry, as the same file may be an input of several parts with different sizes.
+    rel_paths = {}
+    for i in inputs:
+        rel_paths[i[0]] = os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/')
+    labels = ['{}: {:.3f}Kb{}'.format(rel_paths[i[0]], float(i[1]) / 1024,
+                                      ' (may be incorrect due to opt)' if len(i) > 2 else '') for i in inputs]
+
+    tree = [{}, 0]
+    for i in inputs:
+        path = rel_paths[i[0]].split('/')
+        root = tree
+        for el in path:
+            root[1] += i[1]
+            if el not in root[0]:
+                root[0][el] = [{}, 0] if leaf_as_tree or not el.endswith('.js') else i[1]
+            root = root[0][el]
+        if leaf_as_tree:
+            root[1] += i[1]
+
+    by_size = sorted(range(len(inputs)), key=lambda index: inputs[index][1], reverse=True)
+    by_name = sorted(range(len(inputs)), key=lambda index: inputs[index][0])
+    return [
+        ('inputsBySize', [labels[index] for index in by_size]),
+        ('inputsByName', [labels[index] for index in by_name]),
+        ('inputsTree', tree)
+    ]
+
+
+def __write_stat_report(path, modules, build_name):
+    # Streams the report item by item, so only one module views exist in memory at a time.
+    encoder = json.JSONEncoder()
+    inputs = []
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write('{')
+        for (index, (module_name, item)) in enumerate(modules.iteritems()):
+            f.write('%s%s: {' % (', ' if index else '', encoder.encode(module_name)))
+            fields = [('originalInputs', item['originalInputs']), ('inputs', item['inputs'])]
+            fields.extend(__get_stat_views(item['inputs'], False))
+            __write_stat_fields(f, encoder, fields)
+            f.write('}')
+            inputs.extend(item['inputs'])
+
+        f.write('%s%s: {' % (', ' if modules else '', encoder.encode('__%s__' % build_name)))
+        fields = [('inputs', inputs)]
+        fields.extend(__get_stat_views(inputs, True))
+        __write_stat_fields(f, encoder, fields)
+        f.write('}}')
+    os.rename(tmp_path, path)
+
+
+def __write_stat_fields(f, encoder, fields):
+    for (index, (name, value)) in enumerate(fields):
+        f.write('%s%s: ' % (', ' if index else '', encoder.encode(name)))
+        for chunk in encoder.iterencode(value):
+            f.write(chunk)
+
+
+def __flatten_stat_tree(tree, prefix=''):
+    # inputsTree -> {file path: size}. Leaves are sizes in module reports and [{}, size] in the bundle report.
+    res = {}
+    for (name, node) in tree[0].iteritems():
+        path = prefix + name
+        if isinstance(node, (int, long)):
+            res[path] = node
+        elif not node[0] and name.endswith('.js'):
+            res[path] = node[1]
+        else:
+            res.update(__flatten_stat_tree(node, path + '/'))
+    return res
+
+
+def __diff_stat_reports(report, baseline):
+    # Compares module totals and per file sizes of two size.stat.json reports, biggest regressions first.
+    def get_modules(r):
+        return {name: item['inputsTree'] for (name, item) in r.iteritems()
+                if not (name.startswith('__') and name.endswith('__'))}
+
+    def make_item(item, name, old, new, module=None):
+        item.update({'name': name, 'old': old, 'new': new, 'diff': new - old})
+        if module:
+            item['module'] = module
+        return item
+
+    curr_modules = get_modules(report)
+    base_modules = get_modules(baseline)
+    modules = []
+    files = []
+    for name in set(curr_modules) | set(base_modules):
+        curr_tree = curr_modules.get(name, [{}, 0])
+        base_tree = base_modules.get(name, [{}, 0])
+        modules.append(make_item({'added': name not in base_modules, 'removed': name not in curr_modules},
+                                 name, base_tree[1], curr_tree[1]))
+        curr_files = __flatten_stat_tree(curr_tree)
+        base_files = __flatten_stat_tree(base_tree)
+        for path in set(curr_files) | set(base_files):
+            item = make_item({}, path, base_files.get(path, 0), curr_files.get(path, 0), name)
+            if item['diff']:
+                files.append(item)
+
+    sort_key = lambda item: (-item['diff'], item['name'])
+    modules.sort(key=sort_key)
+    files.sort(key=sort_key)
+    return {
+        'modules': modules,
+        'files': files,
+        'total': make_item({}, 'total', sum(m['old'] for m in modules), sum(m['new'] for m in modules))
+    }
+
+
+def __print_stat_diff(diff, limit):
+    def format_item(item):
+        return '{:>12.3f}Kb {:>+12.3f}Kb {:>9}'.format(
+            float(item['new']) / 1024, float(item['diff']) / 1024,
+            '(new)' if not item['old'] else '({:+.1f}%)'.format(100.0 * item['diff'] / item['old']))
+
+    print '  Modules:'
+    for item in diff['modules']:
+        mark = ' [added]' if item['added'] else ' [removed]' if item['removed'] else ''
+        print '    {:<40} {}{}'.format(item['name'], format_item(item), mark)
+    regressions = [item for item in diff['files'] if item['diff'] > 0][:limit]
+    print '  Biggest file regressions:'
+    for item in regressions:
+        print '    {:<70} {} in {}'.format(item['name'], format_item(item), item['module'])
+    if not regressions:
+        print '    none'
+    print '  Total: {}'.format(format_item(diff['total']))
+
+
+# stdout of the command while it prints a JSON document, other output goes to stderr meanwhile, see stat --json
+__json_output = {'stream': None, 'fd': None}
+
+
+def __start_json_output():
+    # file descriptors are redirected, so output of the child processes goes to stderr too
+    sys.stdout.flush()
+    __json_output['fd'] = os.dup(1)
+    __json_output['stream'] = os.fdopen(os.dup(__json_output['fd']), 'w')
+    os.dup2(2, 1)
+
+
+def __stop_json_output():
+    if __json_output['stream'] is None:
+        return
+    sys.stdout.flush()
+    __json_output['stream'].close()
+    os.dup2(__json_output['fd'], 1)
+    os.close(__json_output['fd'])
+    __json_output['stream'] = None
+    __json_output['fd'] = None
+
+
+def __check_stat_diff(report_path, baseline_path, threshold, limit, as_json):
+    # Returns False if any module has grown for more than threshold Kb.
+    with open(report_path, 'r') as f:
+        report = json.load(f)
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    diff = __diff_stat_reports(report, baseline)
+    failed = [] if threshold is None else \
+        [item['name'] for item in diff['modules'] if item['diff'] > threshold * 1024]
+    if as_json:
+        diff.update({'report': report_path, 'baseline': baseline_path, 'threshold': threshold, 'failed': failed})
+        stream = __json_output['stream'] or sys.stdout
+        stream.write(json.dumps(diff, indent=2) + '\n')
+        stream.flush()
+    else:
+        print '\nSize diff of %s against %s' % (report_path, baseline_path)
+        __print_stat_diff(diff, limit)
+        if failed:
+            print '\nModules grown for more than %sKb: %s' % (threshold, ', '.join(failed))
+    return not failed
+
+
+# endregion
+# region --- Source map size attribution
+# ======================================================================================================================
+# Source map size attribution
+# ======================================================================================================================
+BASE64_VLQ_DIGITS = {c: i for (i, c) in enumerate('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/')}
+
+
+def __decode_vlq_segment(segment):
+    values = []
+    value = 0
+    shift = 0
+    for c in segment:
+        digit = BASE64_VLQ_DIGITS[c]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = 0
+            shift = 0
+    return values
+
+
+def __iter_source_map_lines(mappings):
+    # yields a list of (generated column, source index or None) segments for each generated line
+    source = 0
+    for line in mappings.split(';'):
+        column = 0
+        segments = []
+        for segment in line.split(','):
+            if not segment:
+                continue
+            values = __decode_vlq_segment(segment)
+            column += values[0]
+            if len(values) > 1:
+                source += values[1]
+                segments.append((column, source))
+            else:
+                segments.append((column, None))
+        yield segments
+
+
+def __get_source_map_sizes(js_path, map_path):
+    # Output bytes of the generated file by original source file. Bytes not covered by mappings (like part wrappers
+    # and line breaks) are returned separately. Columns are counted in characters, so non-ascii lines are decoded.
+    with open(map_path, 'r') as f:
+        source_map = json.load(f)
+    __check_source_map(js_path, map_path, source_map)
+    sources = [path if os.path.isabs(path) else os.path.normpath(os.path.join(PROJECT_PATH, path))
+               for path in source_map['sources']]
+    sizes = collections.OrderedDict((path, 0) for path in sources)
+    unmapped = 0
+    with open(js_path, 'rb') as f:
+        lines = f.read().split('\n')
+    mapped_lines = __iter_source_map_lines(source_map['mappings'])
+    for (index, line) in enumerate(lines):
+        if index < len(lines) - 1:
+            unmapped += 1
+        segments = next(mapped_lines, [])
+        try:
+            line.decode('ascii')
+            measure = None
+        except UnicodeDecodeError:
+            line = line.decode('utf-8')
+            measure = lambda start, end: len(line[start:end].encode('utf-8'))
+        start = 0
+        owner = None
+        for (column, source) in segments + [(len(line), None)]:
+            size = (column - start) if measure is None else measure(start, column)
+            if owner is None:
+                unmapped += size
+            else:
+                sizes[sources[owner]] += size
+            start = column
+            owner = source
+    return sizes, unmapped
+
+
+def __check_source_map(js_path, map_path, source_map):
+    # map written by an earlier build would attribute sizes to wrong files. Map is written right after the part,
+    # the tolerance covers coarse file systems timestamps.
+    if 'file' in source_map and os.path.basename(source_map['file']) != os.path.basename(js_path):
+        raise Exception('Source map %s is created for %s, not for %s' % (map_path, source_map['file'], js_path))
+    if os.path.getmtime(map_path) < os.path.getmtime(js_path) - 2:
+        raise Exception('Source map %s is older than %s, compile with --stat again' % (map_path, js_path))
+
+
+def __make_source_map_stat(builds, output, theme_name):
+    # size.stat.json from the source maps of the production build parts instead of a separate stat compile
+    parts_output = os.path.join(output, 'parts')
+    modules = collections.OrderedDict()
+    for (build_name, build) in __get_builds().iteritems():
+        if build_name not in builds:
+            continue
+        for (part, files) in __get_parts_files(build, theme_name).iteritems():
+            js_path = os.path.join(parts_output, '%s.js' % part)
+            map_path = os.path.join(parts_output, '%s.map' % part)
+            if not os.path.exists(map_path):
+                raise Exception('No source map for part "%s" found in %s, compile with --stat first' %
+                                (part, parts_output))
+            (sizes, unmapped) = __get_source_map_sizes(js_path, map_path)
+            # code may be moved to the part from files of other parts
+            inputs = [[path, sizes.pop(path, 0)] for path in files]
+            inputs.extend([path, size] for (path, size) in sizes.iteritems() if size)
+            if unmapped:
+                inputs.append([js_path, unmapped])
+            modules[part] = {'originalInputs': files, 'inputs': inputs}
+    __write_stat_report(STAT_REPORT_OUT_PATH, modules, '_'.join(builds))
+    print 'Size statistics report written to %s' % STAT_REPORT_OUT_PATH
+
+
+# endregion
+# region --- Chunks optimization
+# ======================================================================================================================
+# Chunks optimization
+# ======================================================================================================================
+def __get_part_sizes(parts, parts_output):
+    # gzipped sizes of the compiled parts in bytes
+    sizes = collections.OrderedDict()
+    for part in parts:
+        path = os.path.join(parts_output, '%s.js' % part)
+        if not os.path.exists(path):
+            raise Exception('No compiled part "%s" found in %s, run compile first' % (part, parts_output))
+        sizes[part] = __get_gzip_size(path)
+    return sizes
+
+
+def __get_chunks_combos(path):
+    # Typical sets of bundles loaded together: [{"bundles": [...], "weight": 1}, ...].
+    # By default each bundle is loaded alone. Combos are completed with the bundles providing the parts they depend on.
+    bundles = __get_modules_config()['modules']
+    if path:
+        with open(path, 'r') as f:
+            combos = json.load(f)
+        for combo in combos:
+            unknown = [bundle for bundle in combo['bundles'] if bundle not in bundles]
+            if unknown:
+                raise Exception('Unknown bundles in %s: %s' % (path, ', '.join(unknown)))
+        combos = [(combo['bundles'], float(combo.get('weight', 1))) for combo in combos]
+    else:
+        combos = [([bundle_name], 1.0) for bundle_name in bundles]
+    return [(__get_loadable_bundles(bundle_names), weight) for (bundle_names, weight) in combos]
+
+
+def __get_loadable_bundles(bundle_names):
+    # Adds bundles containing the required parts missing in the given ones, the smallest bundle for each part,
+    # e.g. anychart-core for anychart-radar and anychart-cartesian for anychart-pareto.
+    bundles = __get_modules_config()['modules']
+    result = list(bundle_names)
+    loaded = set(part for bundle_name in result for part in bundles[bundle_name]['parts'])
+    for part in sorted(__get_required_parts(bundle_names) - loaded):
+        if part in loaded:
+            continue
+        candidates = [bundle_name for (bundle_name, bundle) in bundles.iteritems() if part in bundle['parts']]
+        if not candidates:
+            raise Exception('No bundle contains part "%s" required by %s' % (part, ', '.join(bundle_names)))
+        bundle_name = min(candidates, key=lambda name: (len(bundles[name]['parts']), name))
+        result.append(bundle_name)
+        loaded.update(bundles[bundle_name]['parts'])
+    return result
+
+
+def __get_required_parts(bundle_names):
+    # parts of the bundles with all their dependencies
+    configs = __get_modules_config()['parts']
+    required = set()
+    stack = [part for bundle_name in bundle_names for part in __get_modules_config()['modules'][bundle_name]['parts']]
+    while stack:
+        part = stack.pop()
+        if part not in required:
+            required.add(part)
+            stack.extend(configs[part].get('deps', []))
+    return required
+
+
+def __get_layout_cost(layout, sizes, combos):
+    # Weighted average of the bytes and requests of loading the combos, when each chunk of the layout containing any
+    # of the required parts is loaded entirely. Without layout bundles of the combos are loaded as they are now,
+    # so parts shared by the bundles of a combo are loaded more than once. Combos should be completed by
+    # __get_loadable_bundles, so both layouts load the same required parts.
+    # layout: [(chunk name, [parts])]
+    bundles_config = __get_modules_config()['modules']
+    total_weight = sum(weight for (bundles, weight) in combos) or 1
+    total_bytes = 0.0
+    total_requests = 0.0
+    for (bundles, weight) in combos:
+        if layout is None:
+            chunks = [bundles_config[bundle_name]['parts'] for bundle_name in bundles]
+        else:
+            required = __get_required_parts(bundles)
+            chunks = [parts for (name, parts) in layout if required.intersection(parts)]
+        total_bytes += weight * sum(sizes.get(part, 0) for parts in chunks for part in parts)
+        total_requests += weight * len(chunks)
+    return total_bytes / total_weight, total_requests / total_weight
+
+
+def __get_bundles_partition(sizes):
+    # Current bundles as disjoint chunks: each part goes to the smallest bundle containing it
+    bundles = __get_modules_config()['modules']
+    groups = collections.OrderedDict()
+    for part in sizes:
+        candidates = [bundle_name for (bundle_name, bundle) in bundles.iteritems() if part in bundle['parts']]
+        key = min(candidates, key=lambda name: (len(bundles[name]['parts']), name)) if candidates else part
+        groups.setdefault(key, []).append(part)
+    return groups.values()
+
+
+def __optimize_chunks(sizes, combos, request_cost):
+    # Greedy merging is run from every part as a chunk and from the current bundles, the cheaper result is returned.
+    # It may still be more expensive than the current layout, as bundles may share parts and chunks can't.
+    def get_cost(layout):
+        (size, requests) = __get_layout_cost(layout, sizes, combos)
+        return size + request_cost * requests
+
+    seeds = [[[part] for part in sizes], __get_bundles_partition(sizes)]
+    return min((__merge_chunks(groups, sizes, combos, request_cost) for groups in seeds), key=get_cost)
+
+
+def __merge_chunks(groups, sizes, combos, request_cost):
+    # Greedy merging of chunks, starting from the groups of parts. Chunks are merged while the weighted cost
+    # (bytes + request_cost for each request) decreases. Merging chunks A and B saves a request for combos using both
+    # and costs size of B for combos using only A and vice versa. Chunk size is estimated as a sum of parts sizes.
+    # Chunks no combo uses are never merged, so they stay on their own.
+    combos_required = [(__get_required_parts(bundles), weight) for (bundles, weight) in combos]
+    chunks = []
+    for parts in groups:
+        users = frozenset(index for (index, (required, weight)) in enumerate(combos_required)
+                          if required.intersection(parts))
+        chunks.append({'parts': list(parts), 'size': sum(sizes[part] for part in parts), 'users': users})
+    weights = [weight for (required, weight) in combos_required]
+
+    def get_weight(users):
+        return sum(weights[index] for index in users)
+
+    while True:
+        best = None
+        for i in range(len(chunks)):
+            for j in range(i + 1, len(chunks)):
+                a = chunks[i]
+                b = chunks[j]
+                delta = b['size'] * get_weight(a['users'] - b['users']) + \
+                    a['size'] * get_weight(b['users'] - a['users']) - \
+                    request_cost * get_weight(a['users'] & b['users'])
+                if delta < 0 and (best is None or delta < best[0]):
+                    best = (delta, i, j)
+        if best is None:
+            break
+        (delta, i, j) = best
+        b = chunks.pop(j)
+        a = chunks[i]
+        chunks[i] = {'parts': a['parts'] + b['parts'], 'size': a['size'] + b['size'], 'users': a['users'] | b['users']}
+
+    # parts in build order
+    order = dict((part, index) for (index, part) in enumerate(sizes))
+    layout = []
+    for chunk in sorted(chunks, key=lambda c: min(order[part] for part in c['parts'])):
+        parts = sorted(chunk['parts'], key=order.get)
+        layout.append(('chunk-%s' % parts[0], parts))
+    return layout
+
+
+def __print_chunks_report(proposed, sizes, combos, request_cost):
+    (current_bytes, current_requests) = __get_layout_cost(None, sizes, combos)
+    (proposed_bytes, proposed_requests) = __get_layout_cost(proposed, sizes, combos)
+    current_cost = current_bytes + request_cost * current_requests
+    proposed_cost = proposed_bytes + request_cost * proposed_requests
+    if proposed_cost >= current_cost:
+        # bundles may share parts, which is not possible for chunks, so hand-picked bundles can be cheaper
+        print '\nNo chunks layout cheaper than the current bundles found for %s combinations ' \
+              '(current load %.1fKb, %.2f requests, best found costs %.1fKb more including requests cost)' % \
+              (len(combos), current_bytes / 1000, current_requests, (proposed_cost - current_cost) / 1000)
+        return {
+            'chunks': None,
+            'current': {'bytes': current_bytes, 'requests': current_requests, 'cost': current_cost}
+        }
+
+    print '\nProposed chunks (%s):' % len(proposed)
+    for (name, parts) in proposed:
+        print '  {:<40} {:>9.1f}Kb  {}'.format(name, sum(sizes[part] for part in parts) / 1000.0, ', '.join(parts))
+    print '\nExpected load for %s combinations (weighted average, gzipped, request cost %sKb):' % \
+          (len(combos), request_cost / 1000.0)
+    print '  {:<10} {:>12} {:>10}'.format('', 'size', 'requests')
+    print '  {:<10} {:>10.1f}Kb {:>10.2f}'.format('current', current_bytes / 1000, current_requests)
+    print '  {:<10} {:>10.1f}Kb {:>10.2f}'.format('proposed', proposed_bytes / 1000, proposed_requests)
+    print '  {:<10} {:>+10.1f}Kb {:>+10.2f}'.format('change', (proposed_bytes - current_bytes) / 1000,
+                                                    proposed_requests - current_requests)
+    print '\nProposed layout saves %.1fKb per load including requests cost' % ((current_cost - proposed_cost) / 1000)
+    return {
+        'chunks': collections.OrderedDict((name, parts) for (name, parts) in proposed),
+        'current': {'bytes': current_bytes, 'requests': current_requests, 'cost': current_cost},
+        'proposed': {'bytes': proposed_bytes, 'requests': proposed_requests, 'cost': proposed_cost}
+    }
+
+
 # endregion
 # region --- Actions
 # ======================================================================================================================
@@ -962,81 +3262,46 @@ def __compile_project(*args, **kwargs):
     builds = kwargs['build'] or ['bundle']
     print '\n%s AnyChart\nVersion: %s\nModule: %s' % ('Checking' if checks else 'Building', __get_build_version(kwargs['is_release']), module)
 
-    compile_errors = ''
-    for build_name, build in __get_builds().iteritems():
-        if build_name in builds:
-            compile_errors += __make_build(build_name, build, checks, kwargs['theme'], kwargs['develop'],
-                                           kwargs['performance_monitoring'], kwargs['manifest'], kwargs['debug_files'],
-                                           output=output, is_amd=kwargs['is_amd'], is_release=kwargs['is_release'])
+    targets = [(build_name, build) for (build_name, build) in __get_builds().iteritems() if build_name in builds]
+    build_kwargs = dict(checks_only=checks, theme_name=kwargs['theme'], dev_edition=kwargs['develop'],
+                        perf_mon=kwargs['performance_monitoring'], gen_manifest=kwargs['manifest'],
+                        debug_files=kwargs['debug_files'], output=output, is_amd=kwargs['is_amd'],
+                        is_release=kwargs['is_release'], use_cache=not kwargs['no_cache'],
+                        source_maps=not checks and (kwargs['stat'] or kwargs['source_maps'] or kwargs['debug_files']))
+
+    # build sequences share no output, so they can be compiled simultaneously.
+    # Bundles are assembled only after all targets are done.
+    if kwargs['jobs'] > 1 and len(targets) > 1:
+        __make_builds_parallel(targets, build_kwargs, kwargs['jobs'])
+    else:
+        for build_name, build in targets:
+            __make_build(build_name, build, **build_kwargs)
 
+    exceeded = None
     if not checks:
         print '\nBuilding bundles\n'
-        module_configs = __get_modules_config()['parts']
-        bundles = __get_modules_config()['modules']
-        built_bundles = {}
-        for bundle_name, bundle in bundles.iteritems():
-            if all(map(lambda module_name: __get_build_name(module_configs[module_name]) in builds, bundle['parts'])):
-                __make_bundle(bundle_name, bundle['parts'], kwargs['develop'], kwargs['performance_monitoring'],
-                              kwargs['debug_files'], kwargs['gzip'], output=output, is_amd=kwargs['is_amd'], is_release=kwargs['is_release'])
-                built_bundles[bundle_name] = bundle['parts']
-            else:
-                print 'Skipping bundle "%s"' % bundle_name
-        for build_name, build in __get_builds().iteritems():
-            if build_name in builds:
-                __make_bundle('anychart-' + build_name, build, kwargs['develop'], kwargs['performance_monitoring'],
-                              kwargs['debug_files'], kwargs['gzip'], output=output, is_amd=kwargs['is_amd'], is_release=kwargs['is_release'])
-                built_bundles['anychart-' + build_name] = build
-
-        modules_json = {'parts': {}, 'modules': {}}
-
-        for part, part_config in module_configs.iteritems():
-            modules_json['parts'][part] = {'deps': part_config.get('deps', [])}
-        for bundle, parts in built_bundles.iteritems():
-            modules_json['modules'][bundle] = {'parts': parts}
-            if bundle in bundles:
-                if 'type' in bundles[bundle]: modules_json['modules'][bundle]['type'] = bundles[bundle]['type']
-                if 'name' in bundles[bundle]: modules_json['modules'][bundle]['name'] = bundles[bundle]['name']
-                if 'icon' in bundles[bundle]: modules_json['modules'][bundle]['icon'] = bundles[bundle]['icon']
-                if 'docs' in bundles[bundle]: modules_json['modules'][bundle]['docs'] = bundles[bundle]['docs']
-                if 'desc' in bundles[bundle]: modules_json['modules'][bundle]['desc'] = bundles[bundle]['desc']
-
-                if kwargs['is_amd']:
-                    bundle_path = os.path.join(output, 'amd', bundle + '.amd.min.js')
-                else:
-                    bundle_path = os.path.join(output, bundle + '.min.js')
-
-                modules_json['modules'][bundle]['size'] = __get_gzip_file_size(bundle_path)
-            elif bundle == 'anychart-bundle':
-                modules_json['modules'][bundle]['name'] = 'AnyChart Bundle'
-                modules_json['modules'][bundle]['type'] = 'bundle'
-                modules_json['modules'][bundle]['desc'] = 'AnyChart Bundle module'
-                modules_json['modules'][bundle]['docs'] = 'https://docs.anychart.com/Quick_Start/Modules#bundle'
-
-        with open(os.path.join(output, 'modules.json'), 'w') as f:
-            f.write(json.dumps(modules_json))
-
-        # resource_json = {'modules': modules_json, 'addons': {}, 'css': {}, 'fonts': {}}
-        resource_json = {}
-        # resource_json['modules'] = modules_json
-        # resource_json['css'] = build_css_indexes()
-        # resource_json['fonts'] = build_fonts_indexes()
-
-        # We are still need to generate resources.json with themes
-        # section cause /bin/sources/modules.json are not presented
-        # on cdn.
-        # resources.json will be overwritten on cdn
-        resource_json['themes'] = __get_modules_config()['themes']
-        # resource_json['locales'] = build_locales_indexes()
-        # resource_json['geodata'] = build_geodata_indexes()
-        # resource_json['addons'] = [ {'name': 'anychart-chart-editor.min.js'},
-        #                             {'name': 'graphics.js'},
-        #                             {'name': 'graphics.min.js'} ]
-
-        with open(os.path.join(output, 'resources.json'), 'w') as f:
-            f.write(json.dumps(resource_json))
+        built_bundles = __make_bundles(builds, output, kwargs)
+
+        if kwargs['hashed_names']:
+            __write_hashed_outputs(built_bundles, output, kwargs['is_amd'])
+
+        codecs = __get_compression_codecs(kwargs)
+        if codecs:
+            __compress_files(__get_compressible_outputs(output), codecs, kwargs['jobs'])
+
+        if kwargs['stat']:
+            print ''
+            __make_source_map_stat(builds, output, kwargs['theme'])
+
+        if not kwargs['no_budgets']:
+            exceeded = __check_size_budgets(built_bundles, output, kwargs['is_amd'])
 
     print ''
-    print compile_errors
+    __print_diagnostics_summary()
+
+    if exceeded:
+        print 'Size budgets exceeded: %s' % ', '.join('%s %s' % (kind, name) for (kind, name, s, b) in exceeded)
+        sys.exit(1)
 
 
 @stopwatch()
@@ -1048,15 +3313,11 @@ def __sync_libs(*args, **kwargs):
 @sync_required()
 @stopwatch()
 def __build_deps(*args, **kwargs):
-    output_file = os.path.join(SRC_PATH, 'deps.js')
-    print 'Writing deps to %s' % output_file
-    subprocess.call([
-        'python',
-        DEPS_WRITER_PATH,
-        '--root_with_prefix=%s %s' % (SRC_PATH, os.path.relpath(SRC_PATH, CLOSURE_SOURCE_PATH)),
-        '--root_with_prefix=%s %s' % (GRAPHICS_SRC_PATH, os.path.relpath(GRAPHICS_SRC_PATH, CLOSURE_SOURCE_PATH)),
-        '--output_file=' + output_file
-    ])
+    (written, parsed_count) = __update_deps_file()
+    if written:
+        print 'Writing deps to %s (%s files parsed)' % (ANYCHART_DEPS_PATH, parsed_count)
+    else:
+        print 'Deps are up to date in %s (%s files parsed)' % (ANYCHART_DEPS_PATH, parsed_count)
 
 
 @sync_required(needs_jsb=True)
@@ -1067,16 +3328,24 @@ def __build_themes(*args, **kwargs):
     output = os.path.join(PROJECT_PATH, kwargs['output']) if kwargs['output'] else OUT_PATH
     text = 'Building %s theme'
 
-    if len(themes) > 1:
-        print 'Building themes (%i items)' % len(themes)
-        text = '  ' + text
-        func = stopwatch('    ')(build_theme)
+    if kwargs['jobs'] > 1 and len(themes) > 1:
+        __build_themes_parallel(themes, output, kwargs['jobs'])
     else:
-        func = build_theme
+        if len(themes) > 1:
+            print 'Building themes (%i items)' % len(themes)
+            text = '  ' + text
+            func = stopwatch('    ')(build_theme)
+        else:
+            func = build_theme
 
-    for theme in themes:
-        print text % theme
-        func(theme, output)
+        for theme in themes:
+            print text % theme
+            func(theme, output)
+
+    codecs = __get_compression_codecs(kwargs)
+    if codecs:
+        __compress_files([os.path.join(output, theme + ext) for theme in themes for ext in ('.min.js', '.js')], codecs,
+                         kwargs['jobs'])
 
 
 @sync_required(needs_lesscpy=True)
@@ -1111,9 +3380,9 @@ def __compile_css(*args, **kwargs):
         with open(css_min_out_path, 'w') as f:
             f.write(header + lesscpy.compile(css_src_path, xminify=True))
 
-        if kwargs['gzip']:
-            __gzip_file(css_out_path)
-            __gzip_file(css_min_out_path)
+        codecs = __get_compression_codecs(kwargs)
+        if codecs:
+            __compress_files([css_out_path, css_min_out_path], codecs)
 
     except ImportError:
         raise ImportError('Please install lesscpy manually first.')
@@ -1123,6 +3392,20 @@ def __compile_css(*args, **kwargs):
 @needs_out_dir
 @stopwatch()
 def __stat(*args, **kwargs):
+    if kwargs['baseline'] and kwargs['report']:
+        if not __check_stat_diff(kwargs['report'], kwargs['baseline'], kwargs['threshold'], kwargs['limit'],
+                                 kwargs['json']):
+            sys.exit(1)
+        return
+
+    if kwargs['source_maps']:
+        __update_deps_file()
+        __make_source_map_stat(['bundle'], OUT_PATH, 'defaultTheme')
+        if kwargs['baseline'] and not __check_stat_diff(STAT_REPORT_OUT_PATH, kwargs['baseline'],
+                                                        kwargs['threshold'], kwargs['limit'], kwargs['json']):
+            sys.exit(1)
+        return
+
     if not kwargs['skip_building']:
         __build_deps()
 
@@ -1179,87 +3462,86 @@ def __stat(*args, **kwargs):
     with open(os.path.join(OUT_PATH, '%s.manifest.json' % build_name), 'r') as f:
         manifest = json.load(f)
 
-    modules_from_manifest = {
-        item['name']: {'originalInputs': files_per_module[item['name']], 'inputs': [[i, 0] for i in item['inputs']]}
-        for item in manifest}
+    modules_from_manifest = collections.OrderedDict(
+        (item['name'], {'originalInputs': files_per_module[item['name']], 'inputs': [[i, 0] for i in item['inputs']]})
+        for item in manifest)
 
-    input_delimiter = re.compile(r'^// Input (\d+)\r?\n?$')
-    module_delimiter = re.compile(r'^// Module (.+)\r?\n?$')
-    with open(os.path.join(OUT_PATH, 'stats-%s.min.js' % build_name), 'r') as f:
-        curr_module = None
-        curr_input = None
-        curr_size = 0
-        for line in f:
-            match = re.match(module_delimiter, line)
-            if match:
-                if curr_input is not None:
-                    modules_from_manifest[curr_module]['inputs'][curr_input][1] = curr_size
-                    if curr_input == 0:
-                        modules_from_manifest[curr_module]['inputs'][curr_input].append(True)
-                curr_size = 0
-                curr_input = None
-                curr_module = match.group(1)
-                # print 'Found module %s' % curr_module
-            else:
-                match = re.match(input_delimiter, line)
-                if match:
-                    if curr_module is None:
-                        raise Exception('Found input delimiter before module delimiter')
-                    if curr_input is not None:
-                        modules_from_manifest[curr_module]['inputs'][curr_input][1] = curr_size
-                        if curr_input == 0:
-                            modules_from_manifest[curr_module]['inputs'][curr_input].append(True)
-                    curr_size = 0
-                    curr_input = int(match.group(1))
-                    # print 'Found input %s' % curr_input
-                else:
-                    curr_size += len(line)
+    __scan_stat_output(os.path.join(OUT_PATH, 'stats-%s.min.js' % build_name), modules_from_manifest)
+    __write_stat_report(STAT_REPORT_OUT_PATH, modules_from_manifest, build_name)
 
-    inputs = []
-    for item in modules_from_manifest.itervalues():
-        item['inputsBySize'] = ['{}: {:.3f}Kb{}'.format(os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/'),
-                                                        float(i[1]) / 1024,
-                                                        ' (may be incorrect due to opt)' if len(i) > 2 else '')
-                                for i in sorted(item['inputs'], cmp=lambda a, b: cmp(a[1], b[1]), reverse=True)]
-        item['inputsByName'] = ['{}: {:.3f}Kb{}'.format(os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/'),
-                                                        float(i[1]) / 1024,
-                                                        ' (may be incorrect due to opt)' if len(i) > 2 else '')
-                                for i in sorted(item['inputs'], cmp=lambda a, b: cmp(a[0], b[0]))]
-        item['inputsTree'] = [{}, 0]
-        for i in item['inputs']:
-            path = os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/').split('/')
-            root = item['inputsTree']
-            for el in path:
-                root[1] += i[1]
-                if el not in root[0]:
-                    root[0][el] = i[1] if el.endswith('.js') else [{}, 0]
-                root = root[0][el]
-
-        inputs.extend(item['inputs'])
-
-    modules_from_manifest['__%s__' % build_name] = {'inputs': inputs}
-    item = modules_from_manifest['__%s__' % build_name]
-    item['inputsBySize'] = ['{}: {:.3f}Kb{}'.format(os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/'),
-                                                    float(i[1]) / 1024,
-                                                    ' (may be incorrect due to opt)' if len(i) > 2 else '')
-                            for i in sorted(item['inputs'], cmp=lambda a, b: cmp(a[1], b[1]), reverse=True)]
-    item['inputsByName'] = ['{}: {:.3f}Kb{}'.format(os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/'),
-                                                    float(i[1]) / 1024,
-                                                    ' (may be incorrect due to opt)' if len(i) > 2 else '')
-                            for i in sorted(item['inputs'], cmp=lambda a, b: cmp(a[0], b[0]))]
-    item['inputsTree'] = [{}, 0]
-    for i in item['inputs']:
-        path = os.path.relpath(i[0], PROJECT_PATH).replace('\\', '/').split('/')
-        root = item['inputsTree']
-        for el in path:
-            root[1] += i[1]
-            if el not in root[0]:
-                root[0][el] = [{}, 0]
-            root = root[0][el]
-        root[1] += i[1]
+    if kwargs['baseline']:
+        if not __check_stat_diff(STAT_REPORT_OUT_PATH, kwargs['baseline'], kwargs['threshold'], kwargs['limit'],
+                                 kwargs['json']):
+            sys.exit(1)
+
+
+@sync_required()
+@needs_out_dir
+def __watch(*args, **kwargs):
+    output = os.path.join(PROJECT_PATH, kwargs['output']) if kwargs['output'] else OUT_PATH
+    __create_dir_if_not_exists(output)
+    if kwargs['is_amd']:
+        __create_dir_if_not_exists(os.path.join(output, 'amd'))
+    builds = kwargs['build'] or ['bundle']
+    build_kwargs = dict(theme_name=kwargs['theme'], dev_edition=kwargs['develop'],
+                        perf_mon=kwargs['performance_monitoring'], output=output, is_amd=kwargs['is_amd'],
+                        is_release=kwargs['is_release'])
+    # files of the build targets from the last successful build
+    state = {}
 
-    with open(STAT_REPORT_OUT_PATH, 'w') as f:
-        f.write(json.dumps(modules_from_manifest))
+    snapshot = __get_watch_snapshot()
+    t = time.time()
+    __watch_rebuild(None, state, builds, build_kwargs, kwargs)
+    print '\nInitial build done in {:.3f} sec'.format(time.time() - t)
+
+    try:
+        while True:
+            print '\nWatching for changes in %s, press Ctrl+C to stop' % ', '.join(
+                os.path.relpath(path, PROJECT_PATH) for path in (SRC_PATH, GRAPHICS_SRC_PATH, CSS_SRC_PATH, SOURCES_PATH))
+            (snapshot, changed, first_change_time) = __wait_for_changes(snapshot, kwargs['interval'],
+                                                                        kwargs['debounce'])
+            print '\nChanged: %s' % ', '.join(sorted(os.path.relpath(path, PROJECT_PATH) for path in changed))
+            __watch_rebuild(changed, state, builds, build_kwargs, kwargs)
+            print '\nRebuilt in {:.3f} sec after the change'.format(time.time() - first_change_time)
+    except KeyboardInterrupt:
+        print '\nWatching stopped'
+
+
+@sync_required(needs_compiler=False)
+def __affected(*args, **kwargs):
+    files = list(kwargs['files'])
+    if kwargs['since']:
+        files.extend(__get_changed_files(kwargs['since']))
+    __update_deps_file()
+    res = __get_affected(files)
+    if kwargs['format'] == 'json':
+        print json.dumps(res, indent=2)
+    else:
+        for bundle in res['bundles']:
+            print bundle
+
+
+@stopwatch()
+def __chunks(*args, **kwargs):
+    parts = [part for build in __get_builds().itervalues() for part in build]
+    sizes = __get_part_sizes(parts, os.path.join(OUT_PATH, 'parts'))
+    combos = __get_chunks_combos(kwargs['combos'])
+    request_cost = kwargs['request_cost'] * 1000
+    print 'Optimizing chunks of %s parts for %s bundles combinations' % (len(sizes), len(combos))
+    proposed = __optimize_chunks(sizes, combos, request_cost)
+    report = __print_chunks_report(proposed, sizes, combos, request_cost)
+    if kwargs['output']:
+        with open(os.path.join(PROJECT_PATH, kwargs['output']), 'w') as f:
+            json.dump(report, f, indent=2)
+        print '\n%s written to %s' % ('Proposed layout' if report['chunks'] else 'Report', kwargs['output'])
+
+
+@sync_required()
+@needs_out_dir
+@stopwatch()
+def __bench(*args, **kwargs):
+    for name in kwargs['names'] or BENCHMARKS.keys():
+        BENCHMARKS[name](kwargs['iterations'])
 
 
 # endregion
@@ -1267,10 +3549,29 @@ def __stat(*args, **kwargs):
 # ======================================================================================================================
 # Main
 # ======================================================================================================================
-def __exec_main_script():
+class LazyText(object):
+    # Help text computed only when the help is printed. Argparse expands help with "help % params", so the text is
+    # produced by the % operator.
+    def __init__(self, func):
+        self.func = func
+
+    def __mod__(self, params):
+        return self.func()
+
+
+def __create_parser():
     # root parser
     parser = argparse.ArgumentParser()
-    parser.set_defaults(compile_css=False, gzip=False)
+    parser.set_defaults(compile_css=False, gzip=False, compress=None, compiler_workers=0, trace=None,
+                        diagnostics=None, fail_fast=False, source_maps=False, debug_files=False, offline=False)
+    parser.add_argument('--offline',
+                        action='store_true',
+                        help='resolve build version without git and GitHub API, using the last cached commits '
+                             'count. Pass it before the command name')
+    parser.add_argument('--trace',
+                        action='store',
+                        help='write spans of the build phases in Chrome trace event format to this path, '
+                             'e.g. out/build.trace.json. Pass it before the command name')
     subparsers = parser.add_subparsers(help='AnyChart framework build script commands:')
 
     # region ---- create parser for the 'compile' command
@@ -1286,7 +3587,12 @@ def __exec_main_script():
                                 manifest=False,
                                 build=None,
                                 is_amd=False,
-                                is_release=False)
+                                is_release=False,
+                                jobs=1,
+                                no_cache=False,
+                                no_budgets=False,
+                                stat=False,
+                                hashed_names=False)
     # compile_parser.add_argument('-s', '--sources',
     #                             action='store_true',
     #                             help='build project sources file (not minimized).')
@@ -1295,9 +3601,9 @@ def __exec_main_script():
                                 help='output build target manifests JSON')
     compile_parser.add_argument('-b', '-m', '--build',
                                 action='append',
-                                help='build target name to be built. Defaults to ["main"]. '
-                                     'Can be passed multiple times. Available build targets: %s' %
-                                     ', '.join(__get_builds().iterkeys()))
+                                help=LazyText(lambda: 'build target name to be built. Defaults to ["main"]. '
+                                                      'Can be passed multiple times. Available build targets: %s' %
+                                                      ', '.join(__get_builds().iterkeys())))
     compile_parser.add_argument('-d', '--develop',
                                 action='store_true',
                                 help='include developers tools into build.')
@@ -1307,6 +3613,11 @@ def __exec_main_script():
     compile_parser.add_argument('-gz', '--gzip',
                                 action='store_true',
                                 help='create gzip copy of output file.')
+    compile_parser.add_argument('-cmp', '--compress',
+                                action='append',
+                                help='compress outputs with the codec, codec level can be set after colon (e.g. "deflate:6"). '
+                                     'Can be passed multiple times. Available codecs: %s. Default level is 9' %
+                                     ', '.join(COMPRESSION_CODECS.keys()))
     compile_parser.add_argument('-df', '--debug_files',
                                 action='store_true',
                                 help='create files with debug info (prop_out, var_out, sourcemap).')
@@ -1326,6 +3637,45 @@ def __exec_main_script():
     compile_parser.add_argument('-r', '--is_release',
                                 action='store_true',
                                 help='Whether compiling as a release')
+    compile_parser.add_argument('-j', '--jobs',
+                                type=int,
+                                action='store',
+                                help='number of build targets (build sequences) to compile in parallel. '
+                                     'Each target output is printed when the target is done. Defaults to 1')
+    compile_parser.add_argument('-nc', '--no_cache',
+                                action='store_true',
+                                help='always run the compiler, ignoring compiled parts cached in %s' %
+                                     os.path.relpath(BUILD_CACHE_PATH, PROJECT_PATH))
+    compile_parser.add_argument('-sm', '--source_maps',
+                                action='store_true',
+                                help='create source maps of the parts and indexed source maps of the bundles '
+                                     '(<bundle>.min.js.map), -df creates them too')
+    compile_parser.add_argument('-st', '--stat',
+                                action='store_true',
+                                help='create source maps of the parts and build size statistics report from them to '
+                                     '%s' % os.path.relpath(STAT_REPORT_OUT_PATH, PROJECT_PATH))
+    compile_parser.add_argument('-hn', '--hashed_names',
+                                action='store_true',
+                                help='also write bundles, parts and css with content hash in names '
+                                     '(anychart-base.<hash>.min.js) and %s manifest with SRI hashes and gzipped '
+                                     'sizes. Hashed files not listed in the new manifest are removed'
+                                     % ASSETS_MANIFEST_NAME)
+    compile_parser.add_argument('-ff', '--fail_fast',
+                                action='store_true',
+                                help='stop the compiler on the first reported error and cancel other parallel targets')
+    compile_parser.add_argument('-dg', '--diagnostics',
+                                action='store',
+                                help='write compiler errors and warnings as JSON records to this path, '
+                                     'e.g. out/diagnostics.json')
+    compile_parser.add_argument('-nb', '--no_budgets',
+                                action='store_true',
+                                help='do not check gzipped sizes of bundles and parts against "budget" values of '
+                                     'the modules config')
+    compile_parser.add_argument('-cw', '--compiler_workers',
+                                type=int,
+                                action='store',
+                                help='number of warm Closure Compiler JVMs to keep for compiler calls instead of starting '
+                                     'a new java process per call. Requires javac. Defaults to 0 (no workers)')
 
     # compile_parser.add_argument('-m', '--module',
     #                             metavar='',
@@ -1336,11 +3686,69 @@ def __exec_main_script():
 
     # endregion
 
+    # region ---- create parser for the 'watch' command
+    watch_parser = subparsers.add_parser('watch', help='build project and rebuild parts, bundles, themes and css '
+                                                       'affected by source changes')
+    watch_parser.set_defaults(action=__watch,
+                              develop=False,
+                              performance_monitoring=False,
+                              gzip=False,
+                              debug_files=False,
+                              theme='defaultTheme',
+                              build=None,
+                              is_amd=False,
+                              is_release=False,
+                              themes=False,
+                              css=False,
+                              interval=0.5,
+                              debounce=0.3)
+    watch_parser.add_argument('-b', '-m', '--build',
+                              action='append',
+                              help='build target name to be built. Defaults to ["bundle"]. '
+                                   'Can be passed multiple times.')
+    watch_parser.add_argument('-d', '--develop',
+                              action='store_true',
+                              help='include developers tools into build.')
+    watch_parser.add_argument('-pm', '--performance_monitoring',
+                              action='store_true',
+                              help='include performance monitoring tools into build.')
+    watch_parser.add_argument('-t', '--theme',
+                              action='store',
+                              help='specify the default theme to compile with. By default - "defaultTheme"')
+    watch_parser.add_argument('-o', '--output',
+                              dest='output',
+                              action='store',
+                              help='Output directory')
+    watch_parser.add_argument('-amd', '--is_amd',
+                              action='store_true',
+                              help='Whether to compile as AMD-module')
+    watch_parser.add_argument('-th', '--themes',
+                              action='store_true',
+                              help='also rebuild standalone theme files affected by changes')
+    watch_parser.add_argument('-css', '--css',
+                              action='store_true',
+                              help='also rebuild AnyChart UI css on css changes')
+    watch_parser.add_argument('-i', '--interval',
+                              type=float,
+                              action='store',
+                              help='file system polling interval in seconds. Defaults to 0.5')
+    watch_parser.add_argument('-db', '--debounce',
+                              type=float,
+                              action='store',
+                              help='seconds without changes to wait for before rebuilding. Defaults to 0.3')
+    watch_parser.add_argument('-cw', '--compiler_workers',
+                              type=int,
+                              action='store',
+                              help='number of warm Closure Compiler JVMs to keep for compiler calls instead of starting '
+                                   'a new java process per call. Requires javac. Defaults to 0 (no workers)')
+    # endregion
+
     # region ---- create parser for the 'themes' command
     themes_parser = subparsers.add_parser('themes',
                                           help='build standalone theme file by name. Default value is "defaultTheme"')
     themes_parser.set_defaults(action=__build_themes,
-                               themes=[])
+                               themes=[],
+                               jobs=1)
     themes_parser.add_argument('-o', '--output',
                                dest='output',
                                action='store',
@@ -1349,9 +3757,23 @@ def __exec_main_script():
     themes_parser.add_argument('-n', '--name',
                                dest='themes',
                                action='append',
-                               help='name of the theme, default value is "defaultTheme". '
-                                    'Can be passed multiple times.\nPossible values are: %s. '
-                                    % ', '.join(__get_themes_list()))
+                               help=LazyText(lambda: 'name of the theme, default value is "defaultTheme". '
+                                                     'Can be passed multiple times.\nPossible values are: %s. '
+                                                     % ', '.join(__get_themes_list())))
+    themes_parser.add_argument('-j', '--jobs',
+                               type=int,
+                               action='store',
+                               help='number of themes to compile and beautify in parallel. Defaults to 1')
+    themes_parser.add_argument('-cmp', '--compress',
+                               action='append',
+                               help='compress outputs with the codec, codec level can be set after colon (e.g. "deflate:6"). '
+                                    'Can be passed multiple times. Available codecs: %s. Default level is 9' %
+                                    ', '.join(COMPRESSION_CODECS.keys()))
+    themes_parser.add_argument('-cw', '--compiler_workers',
+                               type=int,
+                               action='store',
+                               help='number of warm Closure Compiler JVMs to keep for compiler calls instead of starting '
+                                    'a new java process per call. Requires javac. Defaults to 0 (no workers)')
     # endregion
 
     # region --- create parser for the 'libs' command
@@ -1381,15 +3803,96 @@ def __exec_main_script():
                             dest='output',
                             action='store',
                             help='Output directory')
+    css_parser.add_argument('-gz', '--gzip',
+                            action='store_true',
+                            help='create gzip copy of output files.')
+    css_parser.add_argument('-cmp', '--compress',
+                            action='append',
+                            help='compress outputs with the codec, codec level can be set after colon (e.g. "deflate:6"). '
+                                 'Can be passed multiple times. Available codecs: %s. Default level is 9' %
+                                 ', '.join(COMPRESSION_CODECS.keys()))
     # endregion
 
     # region ---- create the parser for the 'stat' command
     stat_parser = subparsers.add_parser('stat', help='build size statistics report')
     stat_parser.set_defaults(action=__stat,
-                             skip_build=False)
+                             skip_build=False,
+                             baseline=None,
+                             report=None,
+                             threshold=None,
+                             limit=20,
+                             json=False,
+                             source_maps=False)
     stat_parser.add_argument('-s', '--skip_building',
                              action='store_true',
                              help='skip building stat-min')
+    stat_parser.add_argument('-sm', '--source_maps',
+                             action='store_true',
+                             help='build the report from source maps of the parts made by "compile --stat" '
+                                  'instead of a separate compilation')
+    stat_parser.add_argument('-bl', '--baseline',
+                             action='store',
+                             help='path to a size.stat.json report of an earlier build to compare the report with')
+    stat_parser.add_argument('-r', '--report',
+                             action='store',
+                             help='compare this existing report with the baseline instead of building a new one')
+    stat_parser.add_argument('-t', '--threshold',
+                             type=float,
+                             action='store',
+                             help='exit with a non-zero code if any module has grown for more than this many Kb '
+                                  'against the baseline')
+    stat_parser.add_argument('-l', '--limit',
+                             type=int,
+                             action='store',
+                             help='number of the biggest file regressions to print. Defaults to 20')
+    stat_parser.add_argument('--json',
+                             action='store_true',
+                             help='print the size diff as JSON. Other output goes to stderr then')
+    stat_parser.add_argument('-cw', '--compiler_workers',
+                             type=int,
+                             action='store',
+                             help='number of warm Closure Compiler JVMs to keep for compiler calls instead of starting '
+                                  'a new java process per call. Requires javac. Defaults to 0 (no workers)')
+    # endregion
+
+    # region ---- create the parser for the 'affected' command
+    affected_parser = subparsers.add_parser('affected', help='print namespaces, parts, bundles, themes and css '
+                                                             'affected by changes in the passed files')
+    affected_parser.set_defaults(action=__affected,
+                                 since=None,
+                                 format='json')
+    affected_parser.add_argument('files',
+                                 nargs='*',
+                                 help='changed files paths, relative to the project root')
+    affected_parser.add_argument('-s', '--since',
+                                 action='store',
+                                 help='also take files changed since the git ref (merge base with HEAD)')
+    affected_parser.add_argument('-f', '--format',
+                                 choices=['json', 'bundles'],
+                                 help='output format: json with all affected entities (default) '
+                                      'or affected bundles names, one per line')
+    # endregion
+
+    # region ---- create the parser for the 'chunks' command
+    chunks_parser = subparsers.add_parser('chunks', help='propose parts layout minimizing expected loaded bytes and '
+                                                         'requests for typical bundles combinations')
+    chunks_parser.set_defaults(action=__chunks,
+                               combos=None,
+                               request_cost=10,
+                               output=None)
+    chunks_parser.add_argument('-c', '--combos',
+                               action='store',
+                               help='JSON file with bundles loaded together and their weights: '
+                                    '[{"bundles": ["anychart-core", "anychart-pie"], "weight": 3}, ...]. '
+                                    'By default each bundle is loaded alone. Bundles providing the required '
+                                    'parts are added to each combination')
+    chunks_parser.add_argument('-rc', '--request_cost',
+                               type=float,
+                               action='store',
+                               help='cost of one request in gzipped Kb, defaults to 10')
+    chunks_parser.add_argument('-o', '--output',
+                               action='store',
+                               help='write proposed chunks and costs as JSON to this path')
     # endregion
 
     # region ---- create the parser for the 'version' command
@@ -1410,8 +3913,46 @@ def __exec_main_script():
                              help="Verify that version is set correctly for all files")
     # endregion
 
+    # region ---- create the parser for the 'bench' command
+    bench_parser = subparsers.add_parser('bench', help='run build script benchmarks')
+    bench_parser.set_defaults(action=__bench,
+                              names=[],
+                              iterations=5)
+    bench_parser.add_argument('-n', '--name',
+                              dest='names',
+                              action='append',
+                              choices=BENCHMARKS.keys(),
+                              help='benchmark to run, can be passed multiple times. By default all benchmarks are run')
+    bench_parser.add_argument('-i', '--iterations',
+                              type=int,
+                              action='store',
+                              help='number of runs for each measurement. Defaults to 5')
+    # endregion
+
+    return parser, subparsers
+
+
+def __exec_main_script():
+    (parser, subparsers) = __create_parser()
     params = parser.parse_args()
-    params.action(**vars(params))
+    if params.action == __stat and params.report and not params.baseline:
+        subparsers.choices['stat'].error('argument -r/--report requires -bl/--baseline')
+    if params.action == __stat and params.json:
+        # only the JSON document is printed to stdout
+        __start_json_output()
+    __init_compiler_workers(params.compiler_workers)
+    __init_diagnostics(params.diagnostics, params.fail_fast)
+    __init_version_resolver(params.offline)
+    if params.trace:
+        __init_trace(params.trace)
+    try:
+        with __trace_span(' '.join(['build.py'] + sys.argv[1:])):
+            params.action(**vars(params))
+    finally:
+        __write_gzip_sizes_cache()
+        __write_diagnostics()
+        __write_trace()
+        __stop_json_output()
 
 
 if __name__ == '__main__':